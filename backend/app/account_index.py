@@ -0,0 +1,157 @@
+"""
+Cross-batch inverted index: account_id -> every batch it appeared in, with
+its role, score and rings there. One postings file per batch lives in the
+batch's artifacts; the merged index is held in memory with a sorted id array
+for prefix search.
+"""
+import json
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.storage import BUCKET_DIR, ARTIFACTS_DIR, artifact_dir, batch_id_from_path
+
+POSTINGS_FILE = "accounts.json"
+SEARCH_LIMIT = 20
+
+
+def build_postings(batch_id: str, processed_at: str, accounts, node_scores, rings) -> List[dict]:
+    """
+    One posting per account in the batch. Scored accounts carry their role
+    and score; every other account is recorded with score 0.
+    """
+    account_rings: Dict[str, List[str]] = {}
+    for ring in rings:
+        for node in dict.fromkeys(ring["nodes"]):
+            account_rings.setdefault(str(node), []).append(ring["ring_id"])
+
+    scored = {str(n["id"]): n for n in node_scores}
+    postings = []
+    for account in dict.fromkeys(str(a) for a in accounts):
+        node = scored.get(account)
+        details = node["details"] if node else {}
+        postings.append({
+            "account": account,
+            "batch_id": batch_id,
+            "processed_at": processed_at,
+            "score": node["risk_score"] if node else 0.0,
+            "role": details.get("role"),
+            "component_id": details.get("component_id"),
+            "ring_ids": account_rings.get(account, []),
+        })
+    return postings
+
+
+class AccountIndex:
+    """In-memory postings keyed by account, plus a sorted id array for autocomplete."""
+
+    def __init__(self):
+        self.postings: Dict[str, List[dict]] = {}
+        self.batches: Dict[str, List[str]] = {}  # batch_id -> accounts, so a batch can be replaced
+        self._sorted_ids = None
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def _add(self, batch_id: str, postings: List[dict]):
+        self._remove(batch_id)
+        for p in postings:
+            self.postings.setdefault(p["account"], []).append(p)
+        self.batches[batch_id] = [p["account"] for p in postings]
+        self._sorted_ids = None
+
+    def _remove(self, batch_id: str):
+        for account in self.batches.pop(batch_id, []):
+            remaining = [p for p in self.postings.get(account, []) if p["batch_id"] != batch_id]
+            if remaining:
+                self.postings[account] = remaining
+            else:
+                self.postings.pop(account, None)
+
+    def add_batch(self, batch_id: str, postings: List[dict]):
+        """Persists a batch's postings and swaps them into the live index."""
+        path = artifact_dir(batch_id) / POSTINGS_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(postings, f, separators=(",", ":"))
+        with self._lock:
+            self._add(batch_id, postings)
+
+    def load(self):
+        """
+        Reads every batch's postings; batches saved before the index existed
+        are indexed from their JSON (scores) and CSV (all accounts) once.
+        """
+        with self._lock:
+            if self.loaded:
+                return
+            for path in sorted(ARTIFACTS_DIR.glob(f"*/{POSTINGS_FILE}")) if ARTIFACTS_DIR.exists() else []:
+                with open(path) as f:
+                    self._add(path.parent.name, json.load(f))
+
+            for json_path in sorted(BUCKET_DIR.glob("batch_*.json")):
+                batch_id = batch_id_from_path(json_path)
+                if batch_id in self.batches:
+                    continue
+                try:
+                    postings = _postings_from_files(json_path, batch_id)
+                except Exception as e:
+                    print(f"Skipping {json_path.name} while indexing accounts: {e}")
+                    continue
+                self._add(batch_id, postings)
+                out = artifact_dir(batch_id) / POSTINGS_FILE
+                out.parent.mkdir(parents=True, exist_ok=True)
+                with open(out, "w") as f:
+                    json.dump(postings, f, separators=(",", ":"))
+            self.loaded = True
+
+    def lookup(self, account: str) -> Optional[dict]:
+        self.load()
+        postings = self.postings.get(account)
+        if not postings:
+            return None
+        appearances = sorted(postings, key=lambda p: p["processed_at"] or "", reverse=True)
+        return {
+            "id": account,
+            "batches": len(appearances),
+            "max_score": max(p["score"] for p in appearances),
+            "ring_ids": sorted({r for p in appearances for r in p["ring_ids"]}),
+            "appearances": [{k: v for k, v in p.items() if k != "account"} for p in appearances],
+        }
+
+    def search(self, prefix: str, limit: int = SEARCH_LIMIT) -> List[dict]:
+        """Accounts whose id starts with `prefix`, in id order."""
+        self.load()
+        with self._lock:
+            if self._sorted_ids is None:
+                self._sorted_ids = np.array(sorted(self.postings), dtype=str)
+            ids = self._sorted_ids
+        # Every id with the prefix sorts between the prefix and prefix + max code point
+        lo = np.searchsorted(ids, prefix, side="left")
+        hi = np.searchsorted(ids, prefix + "\U0010ffff", side="left")
+        matches = ids[lo:min(hi, lo + limit)].tolist()
+        return [
+            {
+                "id": account,
+                "batches": len(self.postings.get(account, [])),
+                "max_score": max((p["score"] for p in self.postings.get(account, [])), default=0.0),
+            }
+            for account in matches
+        ]
+
+
+def _postings_from_files(json_path, batch_id: str) -> List[dict]:
+    with open(json_path) as f:
+        data = json.load(f)
+    accounts = [n["id"] for n in data.get("suspicious_nodes", [])]
+    csv_path = json_path.with_suffix(".csv")
+    if csv_path.exists():
+        df = pd.read_csv(csv_path, usecols=["sender_id", "receiver_id"], dtype=str)
+        accounts += pd.unique(pd.concat([df["sender_id"], df["receiver_id"]])).tolist()
+    return build_postings(batch_id, data.get("processed_at"), accounts,
+                          data.get("suspicious_nodes", []), data.get("rings", []))
+
+
+# Singleton instance
+account_index = AccountIndex()
@@ -0,0 +1,169 @@
+"""
+Account lifecycle index: first-seen, last-seen and the idle gap that preceded
+each account's latest activity, kept as sorted arrays beside the transaction
+store and updated on every ingest.
+"""
+import os
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.rules import current_rules
+from app.storage import STORE_DIR
+
+PROFILE_FILE = STORE_DIR / "accounts.npz"
+DAY_SECONDS = 86400
+
+
+def _epoch_seconds(ts: pd.Series) -> np.ndarray:
+    return ts.to_numpy().astype("datetime64[s]").astype(np.int64)
+
+
+def _activity(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-account first / last timestamp and transaction count, sender and receiver side."""
+    seconds = _epoch_seconds(pd.to_datetime(df["timestamp"]))
+    events = pd.DataFrame({
+        "account": np.concatenate([df["sender_id"].astype(str).to_numpy(), df["receiver_id"].astype(str).to_numpy()]),
+        "t": np.concatenate([seconds, seconds]),
+    })
+    return events.groupby("account")["t"].agg(["min", "max", "count"])
+
+
+class AccountProfiles:
+    """
+    Sorted account ids with parallel lifecycle arrays, so a whole batch is
+    looked up with one searchsorted.
+    """
+
+    def __init__(self, ids: np.ndarray = None, first_seen: np.ndarray = None, last_seen: np.ndarray = None,
+                 last_gap: np.ndarray = None, tx_count: np.ndarray = None):
+        empty = np.zeros(0, dtype=np.int64)
+        self.ids = ids if ids is not None else np.zeros(0, dtype=str)
+        self.first_seen = first_seen if first_seen is not None else empty
+        self.last_seen = last_seen if last_seen is not None else empty
+        self.last_gap = last_gap if last_gap is not None else empty
+        self.tx_count = tx_count if tx_count is not None else empty
+
+    @property
+    def origin(self) -> Optional[int]:
+        """Earliest activity on record: how far back the index can vouch for "new"."""
+        return int(self.first_seen.min()) if len(self.first_seen) else None
+
+    def positions(self, accounts: np.ndarray) -> np.ndarray:
+        """Index of each account in the arrays, -1 when unknown."""
+        accounts = np.asarray(accounts, dtype=str)
+        if not len(self.ids):
+            return np.full(len(accounts), -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.ids, accounts), len(self.ids) - 1)
+        return np.where(self.ids[pos] == accounts, pos, -1)
+
+    def lookup(self, accounts) -> pd.DataFrame:
+        """Profiles for many accounts at once (NaN rows for unknown accounts)."""
+        accounts = np.asarray(accounts, dtype=str)
+        pos = self.positions(accounts)
+        known = pos >= 0
+        out = pd.DataFrame(index=pd.Index(accounts, name="account"))
+        for field in ("first_seen", "last_seen", "last_gap", "tx_count"):
+            values = np.full(len(accounts), np.nan)
+            values[known] = getattr(self, field)[pos[known]]
+            out[field] = values
+        return out
+
+    def update(self, df: pd.DataFrame):
+        """
+        Merges a batch in. For accounts already known, the idle time between
+        their previous last activity and this batch's first activity becomes
+        their last_gap; accounts first seen here start with a gap of 0.
+        """
+        if df.empty:
+            return
+        batch = _activity(df)
+        new_ids = batch.index.to_numpy(dtype=str)
+        ids = np.union1d(self.ids, new_ids)
+
+        def spread(values, source_ids, fill):
+            out = np.full(len(ids), fill, dtype=np.int64)
+            out[np.searchsorted(ids, source_ids)] = values
+            return out
+
+        old = self.positions(ids) >= 0
+        first = spread(self.first_seen, self.ids, np.iinfo(np.int64).max)
+        last = spread(self.last_seen, self.ids, np.iinfo(np.int64).min)
+        gap = spread(self.last_gap, self.ids, 0)
+        count = spread(self.tx_count, self.ids, 0)
+
+        at = np.searchsorted(ids, new_ids)
+        b_first, b_last = batch["min"].to_numpy(), batch["max"].to_numpy()
+        # Activity after everything on record closes an idle gap (out-of-order backfill leaves it alone)
+        resumed = old[at] & (b_first > last[at])
+        gap[at[resumed]] = b_first[resumed] - last[at][resumed]
+        first[at] = np.minimum(first[at], b_first)
+        last[at] = np.maximum(last[at], b_last)
+        count[at] += batch["count"].to_numpy()
+
+        self.ids, self.first_seen, self.last_seen, self.last_gap, self.tx_count = ids, first, last, gap, count
+
+    def save(self):
+        PROFILE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(PROFILE_FILE, ids=self.ids, first_seen=self.first_seen, last_seen=self.last_seen,
+                            last_gap=self.last_gap, tx_count=self.tx_count)
+
+
+# (profile file mtime, AccountProfiles)
+_loaded = None
+
+
+def load_profiles() -> AccountProfiles:
+    """The persisted index, kept in memory until the file changes."""
+    global _loaded
+    if not PROFILE_FILE.exists():
+        return AccountProfiles()
+    mtime = os.path.getmtime(PROFILE_FILE)
+    if _loaded is None or _loaded[0] != mtime:
+        with np.load(PROFILE_FILE) as data:
+            _loaded = (mtime, AccountProfiles(data["ids"], data["first_seen"], data["last_seen"],
+                                              data["last_gap"], data["tx_count"]))
+    return _loaded[1]
+
+
+def detect_profile_risk(df: pd.DataFrame, profiles: AccountProfiles) -> Dict[object, dict]:
+    """
+    Lifecycle anomalies among the batch's receivers, from one indexed join:
+    a dormant account (idle >= dormancy_days before this activity) or a new
+    account (first seen within new_account_days) receiving a burst of
+    profile_burst_tx or more transactions.
+    """
+    if df.empty or not len(profiles.ids):
+        return {}
+
+    # 1. Incoming activity per receiver in this batch
+    seconds = _epoch_seconds(pd.to_datetime(df["timestamp"]))
+    incoming = pd.DataFrame({"account": df["receiver_id"].to_numpy(), "t": seconds}).groupby("account")["t"].agg(["min", "count"])
+    incoming = incoming[incoming["count"] >= current_rules.profile_burst_tx]
+    if incoming.empty:
+        return {}
+
+    # 2. Join against the index
+    prof = profiles.lookup(incoming.index.astype(str))
+    first_seen = prof["first_seen"].to_numpy()
+    last_gap = prof["last_gap"].to_numpy()
+    idle_days = last_gap / DAY_SECONDS
+    age_days = (incoming["min"].to_numpy() - first_seen) / DAY_SECONDS
+
+    dormant = idle_days >= current_rules.dormancy_days
+    # "New" only means something once the index has watched for new_account_days
+    watched = (first_seen - profiles.origin) / DAY_SECONDS >= current_rules.new_account_days
+    new = watched & (age_days <= current_rules.new_account_days)
+
+    flagged = {}
+    for account, count, is_dormant, is_new, idle, age in zip(
+            incoming.index, incoming["count"].tolist(), dormant, new, idle_days, age_days):
+        if is_dormant or is_new:
+            flagged[account] = {
+                "pattern": "dormant_burst" if is_dormant else "new_account_burst",
+                "incoming_tx": int(count),
+                "idle_days": round(float(idle), 1),
+                "age_days": round(float(age), 1),
+            }
+    return flagged
@@ -1,19 +1,41 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Body, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from app.validation import validate_csv
-from app.graph_builder import build_graph
-from app.detection_engine import detect_cycles, detect_fan_out, detect_fan_in, detect_layered_shells, detect_commission
-from app.scoring_engine import calculate_node_score, aggregate_rings
-from app.schemas import DetectionResult, NodeScore, Ring
+from fastapi.responses import JSONResponse, Response
+from app.serialization import render_file, respond, prime, loads, wants_msgpack
+from app import rules
+from app.schemas import DetectionResult
+from app.storage import latest_file, batch_id_from_path
+from app.startup import lazy_module, readiness, start_warm_up, storage_probe
 from datetime import datetime
+from typing import Optional
+import calendar
+import gzip
 import uuid
 import shutil
 import os
-from pathlib import Path
-import networkx as nx
 
-app = FastAPI()
+# Heavy modules (pandas / networkx / numpy) load on first use or during the
+# boot warm-up, so the process answers /health as soon as it starts
+validation = lazy_module("app.validation")
+graph_builder = lazy_module("app.graph_builder")
+pipeline = lazy_module("app.pipeline")
+sweep = lazy_module("app.sweep")
+compact_graph = lazy_module("app.compact_graph")
+layouts = lazy_module("app.layouts")
+transaction_store = lazy_module("app.transaction_store")
+account_index = lazy_module("app.account_index")
+rings = lazy_module("app.rings")
+stats = lazy_module("app.stats")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_warm_up()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS — allow frontend origins (local dev + deployed)
 app.add_middleware(
@@ -26,107 +48,106 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Focus-Node"],
 )
 
 @app.get("/health")
 def health():
-    return {"status": "ok", "timestamp": datetime.utcnow()}
+    """
+    Liveness plus warm state. `status` is ok whenever the process answers;
+    `ready` turns true once the boot warm-up has preloaded the pipeline.
+    """
+    return {
+        "status": "ok",
+        "timestamp": datetime.utcnow(),
+        "ready": readiness.ready,
+        **storage_probe(),
+    }
+
+@app.get("/health/ready")
+def health_ready():
+    """Readiness probe: 503 until the warm-up finishes, with import and preload timings."""
+    report = readiness.report()
+    if not readiness.ready:
+        return JSONResponse(status_code=503, content=report)
+    return report
+
+def _srs_export(raw_data: dict) -> dict:
+    """Transform a stored batch into the SRS export format."""
+    # Transform to SRS Format
+    
+    # 0. Node -> Ring Mapping
+    # Persisted with the batch (highest-risk ring per account); older batches derive it from their rings
+    membership = rings.RingMembership.load(raw_data.get("batch_id", "")) or rings.RingMembership.from_rings(raw_data.get("rings", []))
+    suspects = raw_data.get("suspicious_nodes", [])
+    assigned_rings = membership.lookup([node["id"] for node in suspects], default="INDIVIDUAL_SUSPECT")
+
+    # 1. Suspicious Accounts
+    suspicious_accounts = []
+    for node, assigned_ring in zip(suspects, assigned_rings):
+        patterns = []
+        details = node.get("details", {})
+        if details.get("cycles") == 1: patterns.append("cycle_involved")
+        if details.get("smurfing") == 1: patterns.append("high_velocity_smurfing")
+        if details.get("shells") == 1: patterns.append("layered_shell")
+        if details.get("role") == "Mule": patterns.append("mule_account")
+        
+        suspicious_accounts.append({
+            "account_id": node["id"],
+            "suspicion_score": node["risk_score"],
+            "detected_patterns": patterns,
+            "ring_id": assigned_ring
+        })
+
+    # 2. Fraud Rings
+    fraud_rings = []
+    for ring in raw_data.get("rings", []):
+        fraud_rings.append({
+            "ring_id": ring["ring_id"],
+            "member_accounts": ring["nodes"],
+            "pattern_type": ring["pattern_type"],
+            "risk_score": ring["risk_score"]
+        })
+        
+    # 3. Summary
+    raw_summary = raw_data.get("summary", {})
+    summary = {
+        "total_accounts_analyzed": raw_summary.get("total_transactions", 0) * 2, # Approx unique accounts? Or just pass txs
+        "suspicious_accounts_flagged": len(suspicious_accounts),
+        "fraud_rings_detected": len(fraud_rings),
+        "processing_time_seconds": 2.3 # Placeholder, requires instrumentation in analyze
+    }
+
+    return {
+        "suspicious_accounts": suspicious_accounts,
+        "fraud_rings": fraud_rings,
+        "summary": summary
+    }
 
 @app.get("/export/json")
-def export_json():
+def export_json(request: Request):
     """
     Download the most recent analysis batch as a JSON file, 
     formatted strictly according to the SRS requirements.
+    Rendered once per batch and served from memory.
     """
-    BUCKET_DIR = Path(__file__).parent.parent / "bucket"
-    if not BUCKET_DIR.exists():
-        raise HTTPException(status_code=404, detail="No data available")
-        
-    files = sorted(BUCKET_DIR.glob("*.json"), key=os.path.getmtime, reverse=True)
-    if not files:
+    latest = latest_file("batch_*.json")
+    if latest is None:
         raise HTTPException(status_code=404, detail="No data available")
-        
-    latest_file = files[0]
-    
-    import json
+
     try:
-        with open(latest_file, 'r') as f:
-            raw_data = json.load(f)
-            
-        # Transform to SRS Format
-        
-        # 0. Build Node -> Ring Mapping
-        # Rings are sorted by risk_score DESC, so we take the first (highest risk) assignment
-        node_to_ring = {}
-        for ring in raw_data.get("rings", []):
-            r_id = ring["ring_id"]
-            for node_id in ring["nodes"]:
-                if node_id not in node_to_ring:
-                    node_to_ring[node_id] = r_id
-
-        # 1. Suspicious Accounts
-        suspicious_accounts = []
-        for node in raw_data.get("suspicious_nodes", []):
-            patterns = []
-            details = node.get("details", {})
-            if details.get("cycles") == 1: patterns.append("cycle_involved")
-            if details.get("smurfing") == 1: patterns.append("high_velocity_smurfing")
-            if details.get("shells") == 1: patterns.append("layered_shell")
-            if details.get("role") == "Mule": patterns.append("mule_account")
-            
-            # Resolve Ring ID
-            # If not in a ring, label as Individual or specific role
-            assigned_ring = node_to_ring.get(node["id"], "INDIVIDUAL_SUSPECT")
-            
-            suspicious_accounts.append({
-                "account_id": node["id"],
-                "suspicion_score": node["risk_score"],
-                "detected_patterns": patterns,
-                "ring_id": assigned_ring
-            })
-
-        # 2. Fraud Rings
-        fraud_rings = []
-        for ring in raw_data.get("rings", []):
-            fraud_rings.append({
-                "ring_id": ring["ring_id"],
-                "member_accounts": ring["nodes"],
-                "pattern_type": ring["pattern_type"],
-                "risk_score": ring["risk_score"]
-            })
-            
-        # 3. Summary
-        raw_summary = raw_data.get("summary", {})
-        summary = {
-            "total_accounts_analyzed": raw_summary.get("total_transactions", 0) * 2, # Approx unique accounts? Or just pass txs
-            "suspicious_accounts_flagged": len(suspicious_accounts),
-            "fraud_rings_detected": len(fraud_rings),
-            "processing_time_seconds": 2.3 # Placeholder, requires instrumentation in analyze
-        }
-
-        export_data = {
-            "suspicious_accounts": suspicious_accounts,
-            "fraud_rings": fraud_rings,
-            "summary": summary
-        }
-        
-        # Save temp export file
-        export_file = BUCKET_DIR / f"export_{latest_file.name}"
-        with open(export_file, 'w') as f:
-            json.dump(export_data, f, indent=2)
-            
-        return FileResponse(
-            path=export_file, 
-            filename="forensic_analysis_export.json",
-            media_type='application/json'
-        )
+        payload = render_file(latest, "export", lambda raw: _srs_export(loads(raw)))
     except Exception as e:
         print(f"Export transformation failed: {e}")
         raise HTTPException(status_code=500, detail="Export failed")
 
+    return respond(request, payload, headers={
+        "Content-Disposition": 'attachment; filename="forensic_analysis_export.json"'
+    })
+
 
 @app.post("/analyze", response_model=DetectionResult)
-async def analyze_transaction_data(file: UploadFile = File(...)):
+async def analyze_transaction_data(request: Request, file: UploadFile = File(...), include_history: bool = False):
     print(f"Received upload request: {file.filename}")
     # 1. Save temp file
     temp_filename = f"temp_{uuid.uuid4()}.csv"
@@ -136,116 +157,33 @@ async def analyze_transaction_data(file: UploadFile = File(...)):
 
     try:
         # 2. Validate
-        df = validate_csv(temp_filename)
-        
-        # 3. Build Graph
-        G = build_graph(df)
-        
-        # 4. Detect Patterns
-        cycles = detect_cycles(G)
-        fan_out = detect_fan_out(G)
-        fan_in = detect_fan_in(G)
-        shells = detect_layered_shells(G)
-        commissions = detect_commission(G, cycles)
-        
-        # 4a. Legacy Clustering (Run early to inform scoring)
-        from app.clustering import analyze_clusters
-        clusters = analyze_clusters(df)
-        cluster_mule_ids = {m["id"] for m in clusters["mule_accounts"]}
-
-        # 4b. Enrich Clusters with Detection Flags & Graph Metrics
-        commission_set = set(commissions)
-        for category in ["mule_accounts", "suspected_distribution", "websites"]:
-            for node_obj in clusters.get(category, []):
-                nid = node_obj["id"]
-                node_obj["is_commission"] = nid in commission_set
-                
-                # Calculate Fan-in/Fan-out Ratio
-                if G.has_node(nid):
-                    in_deg = G.in_degree(nid)
-                    out_deg = G.out_degree(nid)
-                    # Ratio: High In / Low Out = High Ratio (Mule-like)
-                    # Avoid division by zero
-                    node_obj["fan_in_out_ratio"] = in_deg / (out_deg if out_deg > 0 else 0.1)
-                else:
-                    node_obj["fan_in_out_ratio"] = 0
-
-
-        # 5. Score Nodes
-        # Pre-calculate Cluster Sizes (Weakly Connected Components)
-        undirected_G = G.to_undirected()
-        node_to_cluster_size = {}
-        for component in nx.connected_components(undirected_G):
-            size = len(component)
-            for n in component:
-                node_to_cluster_size[n] = size
-
-        node_scores = []
-        for node in G.nodes():
-            score = calculate_node_score(node, cycles, fan_out, fan_in, shells, commissions)
-            
-            # Force inclusion if flagged by clustering (Mule)
-            is_cluster_mule = node in cluster_mule_ids
-            if is_cluster_mule and score == 0:
-                score = 50.0 # Assign a base risk score for heuristic mules
-            
-            if score > 0:
-                is_mule = (node in fan_in) or is_cluster_mule
-                is_originator = node in fan_out
-                
-                details = {
-                    "cycles": 1 if any(node in c for c in cycles) else 0,
-                    "smurfing": 1 if (is_originator or is_mule) else 0,
-                    "shells": 1 if any(node in s for s in shells) else 0,
-                    "role": "Mule" if is_mule else ("Originator" if is_originator else "Participant"),
-                    "degree": int(G.degree(node)),
-                    "cluster_size": node_to_cluster_size.get(node, 0)
-                }
-                # print(f"DEBUG NODE {node}: Score={score}, IsMule={is_mule}, IsOrig={is_originator}, FanInCount={len(fan_in)}")
-                node_scores.append(NodeScore(
-                    id=str(node), 
-                    risk_score=score, 
-                    details=details
-                ))
-        
-        node_scores.sort(key=lambda x: x.risk_score, reverse=True)
+        df = validation.validate_csv(temp_filename)
 
-        # 6. Aggregate Rings
-        rings = aggregate_rings(cycles, G)
-        
-        summary = {
-            "total_transactions": len(df),
-            "mule_count": len(clusters["mule_accounts"]),
-            "suspected_count": len(clusters["suspected_distribution"]),
-            "flagged_amount": sum(m.get("totalAmount", 0) for m in clusters["mule_accounts"]),
-        }
+        # 3. Merge into the historical store (dedup by transaction_id)
+        ingest_stats = transaction_store.ingest(df)
 
-        
-        # 8. Persist Result
-        result = DetectionResult(
-            batch_id=str(uuid.uuid4()),
-            processed_at=datetime.utcnow(),
-            total_transactions=len(df),
-            suspicious_nodes=node_scores[:50], # Top 50
-            rings=rings,
-            clusters=clusters,
-            summary=summary
-        )
-        
-        # Save to bucket
-        BUCKET_DIR = Path(__file__).parent.parent / "bucket"
-        BUCKET_DIR.mkdir(exist_ok=True)
-        timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-        bucket_file = BUCKET_DIR / f"batch_{timestamp_str}_{result.batch_id}.json"
-        
-        with open(bucket_file, "w") as f:
-            f.write(result.json())
+        # 4. Optionally widen to stored history so cross-batch patterns are visible
+        summary_extra = {"store": ingest_stats}
+        if include_history:
+            df = transaction_store.load_range(
+                df["timestamp"].min(),
+                df["timestamp"].max(),
+                lookback_hours=transaction_store.history_horizon_hours(),
+            )
+            summary_extra["source"] = "history"
+
+        # 5. Detect, Score & Aggregate
+        result, compact = pipeline.run_analysis(df, summary_extra=summary_extra)
 
-        # Also save CSV for graph reconstruction
-        csv_file = BUCKET_DIR / f"batch_{timestamp_str}_{result.batch_id}.csv"
-        shutil.copy(temp_filename, csv_file)
+        # 6. Persist Result (+ CSV for graph reconstruction)
+        batch_path = pipeline.save_batch(result, compact)
+        if include_history:
+            df.to_csv(batch_path.with_suffix(".csv"), index=False)
+        else:
+            shutil.copy(temp_filename, batch_path.with_suffix(".csv"))
+        transaction_store.record_source(batch_path.with_suffix(".csv").name)
 
-        return result
+        return respond(request, render_file(batch_path.with_suffix(".json"), "raw"))
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -253,92 +191,296 @@ async def analyze_transaction_data(file: UploadFile = File(...)):
         if os.path.exists(temp_filename):
             os.remove(temp_filename)
 
+# Rules Endpoints
+@app.get("/rules")
+def get_rules():
+    """Current detection rules and their version."""
+    return {"version": rules.rules_version, "rules": rules.current_rules.dict()}
+
+@app.get("/rules/history")
+def get_rules_history():
+    return rules.rules_history
+
+@app.put("/rules")
+def put_rules(changes: dict = Body(...)):
+    """
+    Update any subset of the detection rules at runtime.
+    Reports which pipeline stages the change invalidates.
+    """
+    try:
+        changed = rules.update_rules(changes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "version": rules.rules_version,
+        "changed": sorted(changed),
+        "invalidates": sorted(pipeline.invalidated_stages(changed)),
+    }
+
+@app.post("/batches/{batch_id}/rescore", response_model=DetectionResult)
+def rescore_batch(batch_id: str, persist: bool = True):
+    """
+    Re-score a stored batch under the current rules, rerunning only invalidated stages.
+    With persist=false the stored batch is left untouched (dry run for threshold tuning).
+    """
+    result = pipeline.rescore(batch_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    result.summary["rules_version"] = rules.rules_version
+
+    json_path = pipeline.find_batch_file(batch_id, ".json")
+    if persist and json_path is not None:
+        body = result.json().encode()
+        json_path.write_bytes(body)
+        prime(json_path, body)
+        pipeline.save_artifacts(result, pipeline.load_state(batch_id).outputs["compact"].node_ids.tolist())
+    return result
+
+@app.post("/sweep")
+def sweep_rules(
+    grid: dict = Body(..., embed=True),
+    batch_id: str = Body(None, embed=True),
+    labels: list = Body(None, embed=True),
+    min_score: float = Body(50.0, embed=True),
+):
+    """
+    What-if evaluation of a grid of rule settings against one batch (default: latest).
+    Pass known-bad account ids as `labels` to get precision/recall per setting.
+    """
+    if batch_id is None:
+        latest_csv = latest_file("batch_*.csv")
+        if latest_csv is None:
+            raise HTTPException(status_code=404, detail="No data available")
+        batch_id = batch_id_from_path(latest_csv)
+
+    state = pipeline.load_state(batch_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    try:
+        report = sweep.run_sweep(state, grid, labels, min_score)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    report["batch_id"] = batch_id
+    return report
+
+# History Endpoints
+@app.get("/history/partitions")
+def get_history_partitions():
+    """List the day partitions held by the historical transaction store."""
+    return transaction_store.list_partitions()
+
+@app.post("/history/backfill")
+def backfill_history():
+    """Load every batch CSV already in the bucket into the historical store."""
+    return transaction_store.backfill()
+
+@app.post("/history/analyze", response_model=DetectionResult)
+def analyze_history(start: datetime, end: datetime, request: Request):
+    """
+    Run the detectors over every stored transaction in [start, end].
+    Partitions older than the fan-in/out window and cycle horizon are never read.
+    """
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not precede start")
+
+    lookback = transaction_store.history_horizon_hours()
+    df = transaction_store.load_range(start, end, lookback_hours=lookback)
+    if df.empty:
+        raise HTTPException(status_code=404, detail="No stored transactions in range")
+
+    try:
+        result, compact = pipeline.run_analysis(df, summary_extra={
+            "source": "history",
+            "window": {"start": start.isoformat(), "end": end.isoformat(), "lookback_hours": lookback},
+        })
+        batch_path = pipeline.save_batch(result, compact)
+        df.to_csv(batch_path.with_suffix(".csv"), index=False)
+        # Its rows came from the store, so backfill must not re-ingest it
+        transaction_store.record_source(batch_path.with_suffix(".csv").name)
+        return respond(request, render_file(batch_path.with_suffix(".json"), "raw"))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/data")
-def get_latest_data():
-    """Return the most recent stored batch."""
-    BUCKET_DIR = Path(__file__).parent.parent / "bucket"
-    if not BUCKET_DIR.exists():
-        return {"clusters": {}}
-        
-    files = sorted(BUCKET_DIR.glob("*.json"), key=os.path.getmtime, reverse=True)
-    if not files:
+def get_latest_data(request: Request):
+    """Return the most recent stored batch, as stored (no re-parse), with ETag support."""
+    latest = latest_file("batch_*.json")
+    if latest is None:
         return {"clusters": {}}
 
-    with open(files[0]) as f:
-        import json
-        return json.load(f)
+    variant = "msgpack" if wants_msgpack(request) else "raw"
+    return respond(request, render_file(latest, variant))
+
+@app.get("/stats")
+def get_stats(request: Request, batch_id: Optional[str] = None):
+    """
+    Dashboard aggregates over every scored account of a batch (default: latest),
+    precomputed at analysis time and served as stored.
+    """
+    if batch_id is None:
+        latest_csv = latest_file("batch_*.csv")
+        if latest_csv is None:
+            raise HTTPException(status_code=404, detail="No data available")
+        batch_id = batch_id_from_path(latest_csv)
+
+    path = stats.stats_path(batch_id)
+    if not path.exists():
+        # Batches analyzed before stats were persisted: compute once from the stored CSV.
+        # That reruns scoring under the current rules, so the stats say which rules
+        # they used and which the stored batch JSON was produced under.
+        state = pipeline.load_state(batch_id)
+        if state is None:
+            raise HTTPException(status_code=404, detail="Batch not found")
+        stored = latest_file(f"batch_*_{batch_id}.json")
+        summary = loads(stored.read_bytes()).get("summary", {}) if stored is not None else {}
+        stats.save_stats({
+            **state.outputs["stats"],
+            "backfilled": True,
+            "batch_rules_version": summary.get("rules_version"),
+        })
+    return respond(request, render_file(path, "raw"))
+
+def _epoch(dt: Optional[datetime]) -> Optional[int]:
+    # Naive timestamps are treated as UTC, like the stored transaction times
+    return None if dt is None else calendar.timegm(dt.utctimetuple())
 
 @app.get("/investigation/network/{node_id}")
-def get_network_graph(node_id: str):
-    BUCKET_DIR = Path(__file__).parent.parent / "bucket"
-    if not BUCKET_DIR.exists():
-        return {"nodes": [], "links": []}
-    
-    # Find latest CSV
-    files = sorted(BUCKET_DIR.glob("*.csv"), key=os.path.getmtime, reverse=True)
-    if not files:
+def get_network_graph(
+    node_id: str,
+    as_of: Optional[datetime] = None,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    buckets: int = 48,
+):
+    """
+    Component of `node_id` in the latest batch, optionally as of a point in time
+    (`as_of`) or within [`from`, `to`]: only edges active in the window, with
+    per-edge counts / amounts and a time-bucketed activity series for playback.
+    """
+    if as_of is not None and end is not None:
+        raise HTTPException(status_code=400, detail="Pass either as_of or to, not both")
+    end = as_of if as_of is not None else end
+    if start is not None and end is not None and end < start:
+        raise HTTPException(status_code=400, detail="to must not precede from")
+
+    _, compact = _latest_compact_graph()
+    if compact is None:
         return {"nodes": [], "links": []}
-        
-    # Rebuild Graph
+
+    # Answered from the compact graph's time-sorted edge arrays; no graph is rebuilt
+    graph_data = graph_builder.get_window_graph(compact, node_id, _epoch(start), _epoch(end),
+                                                max_nodes=100, buckets=min(max(buckets, 1), 500))
+
+    # Enrich nodes with basic metadata (placeholder for now)
+    for node in graph_data["nodes"]:
+        node["group"] = "suspected" if node["id"] == node_id else "related"
+        node["r"] = 30 if node["id"] == node_id else 15
+
+    return graph_data
+
+def _latest_compact_graph():
+    """
+    Compact graph of the latest batch, built (and saved) from its CSV for
+    older batches, including those saved before transaction times were kept.
+    """
+    latest_csv = latest_file("batch_*.csv")
+    if latest_csv is None:
+        return None, None
+    batch_id = batch_id_from_path(latest_csv)
+    compact = compact_graph.CompactGraph.load(batch_id)
+    if compact is None or compact.times is None:
+        compact = compact_graph.CompactGraph.from_dataframe(validation.validate_csv(latest_csv))
+        compact.save(batch_id)
+    return batch_id, compact
+
+def _layout_response(body: bytes, request: Request, focus: str = None) -> Response:
+    """Serve a cached gzipped layout as-is when the client accepts gzip."""
+    headers = {"X-Focus-Node": focus} if focus else {}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+    else:
+        body = gzip.decompress(body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/investigation/layout/{node_id}")
+def get_network_layout(node_id: str, request: Request):
+    """
+    Pre-computed layout of the component containing `node_id`.
+    Large components come back as super-nodes; expand them via /investigation/layout/expand/{key}.
+    """
+    batch_id, compact = _latest_compact_graph()
+    label = compact.component_label(node_id) if compact is not None else None
+    if label is None:
+        raise HTTPException(status_code=404, detail="Node not found in latest batch")
+
+    body = layouts.get_layout(compact, batch_id, f"c{label}")
+    return _layout_response(body, request, focus=layouts.focus_key(compact, batch_id, node_id))
+
+@app.get("/investigation/layout/expand/{key}")
+def expand_network_layout(key: str, request: Request):
+    """Layout of the accounts (or finer super-nodes) collapsed into super-node `key`."""
+    batch_id, compact = _latest_compact_graph()
+    if compact is None:
+        raise HTTPException(status_code=404, detail="No data available")
     try:
-        df = validate_csv(files[0])
-        G = build_graph(df)
-        
-        from app.graph_builder import get_component_graph
-        # Use component graph (Cluster) instead of Ego graph
-        graph_data = get_component_graph(G, node_id, max_nodes=100)
-        
-        # Enrich nodes with basic metadata (placeholder for now)
-        for node in graph_data["nodes"]:
-            node["group"] = "suspected" if node["id"] == node_id else "related"
-            node["r"] = 30 if node["id"] == node_id else 15
-            
-        return graph_data
-    except Exception as e:
-        print(f"Error building graph: {e}")
-        return {"nodes": [], "links": []}
+        body = layouts.get_layout(compact, batch_id, key)
+    except (KeyError, ValueError, IndexError):
+        raise HTTPException(status_code=404, detail=f"Unknown layout key: {key}")
+    return _layout_response(body, request)
+
+# Account Endpoints
+@app.get("/accounts/search")
+def search_accounts(q: str, limit: int = 20):
+    """Autocomplete: accounts whose id starts with `q`, across every stored batch."""
+    if not q:
+        raise HTTPException(status_code=400, detail="Query must not be empty")
+    return account_index.account_index.search(q, limit=min(max(limit, 1), 100))
+
+@app.get("/accounts/{account_id}")
+def get_account(account_id: str):
+    """Every batch an account appeared in, with its role, score and rings there."""
+    entry = account_index.account_index.lookup(account_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Account not found in any batch")
+    return entry
+
+def _suspects_view(data: dict) -> list:
+    # Map the stored suspicious_nodes to the frontend format if needed
+    # Frontend expects: { id, score, ... }
+    # Backend stores: { id, risk_score, details }
+    suspects = []
+    for node in data.get("suspicious_nodes", [])[:10]: # Top 10
+        # Extract patterns
+        patterns = []
+        details = node.get("details", {})
+        if details.get("cycles") == 1:
+            patterns.append("Circular")
+        if details.get("smurfing") == 1:
+            patterns.append("Smurfing")
+
+        suspects.append({
+            "id": node["id"],
+            "score": node["risk_score"],
+            "cluster": "High Risk", # Placeholder or derive from details
+            "nodes": node["details"].get("cluster_size", node["details"].get("degree", 0)), 
+            "status": "Active",
+            "patterns": patterns
+        })
+    return suspects
 
 # Investigation Endpoints
 @app.get("/investigation/suspects")
-def get_suspects():
+def get_suspects(request: Request):
     """
     Returns the top suspicious nodes from the latest analysis batch.
     """
-    BUCKET_DIR = Path(__file__).parent.parent / "bucket"
-    if not BUCKET_DIR.exists():
-        return []
-    
-    files = sorted(BUCKET_DIR.glob("*.json"), key=os.path.getmtime, reverse=True)
-    if not files:
+    latest = latest_file("batch_*.json")
+    if latest is None:
         return []
 
     try:
-        with open(files[0]) as f:
-            import json
-            data = json.load(f)
-            
-            # Map the stored suspicious_nodes to the frontend format if needed
-            # Frontend expects: { id, score, ... }
-            # Backend stores: { id, risk_score, details }
-            suspects = []
-            for node in data.get("suspicious_nodes", [])[:10]: # Top 10
-                # Extract patterns
-                patterns = []
-                details = node.get("details", {})
-                if details.get("cycles") == 1:
-                    patterns.append("Circular")
-                if details.get("smurfing") == 1:
-                    patterns.append("Smurfing")
-
-                suspects.append({
-                    "id": node["id"],
-                    "score": node["risk_score"],
-                    "cluster": "High Risk", # Placeholder or derive from details
-                    "nodes": node["details"].get("cluster_size", node["details"].get("degree", 0)), 
-                    "status": "Active",
-                    "patterns": patterns
-                })
-            return suspects
+        payload = render_file(latest, "suspects", lambda raw: _suspects_view(loads(raw)))
     except Exception as e:
         print(f"Error fetching suspects: {e}")
         return []
+    return respond(request, payload)
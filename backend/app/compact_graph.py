@@ -0,0 +1,181 @@
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.storage import artifact_dir
+
+GRAPH_FILE = "graph.npz"
+LOADED_CACHE_SIZE = 4  # Compact graphs kept in memory between investigation requests
+
+
+def union_find_labels(n: int, src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """
+    Labels the weakly connected components of an n-node edge list in one pass.
+    Returns a dense label (0..k-1) per node.
+    """
+    parent = list(range(n))
+
+    def find(x):
+        # Path halving keeps trees flat without recursion
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for u, v in zip(src.tolist(), dst.tolist()):
+        ru, rv = find(u), find(v)
+        if ru != rv:
+            parent[rv] = ru
+
+    # Flatten remaining chains with vectorized pointer jumping
+    roots = np.asarray(parent, dtype=np.int64)
+    while True:
+        jumped = roots[roots]
+        if np.array_equal(jumped, roots):
+            break
+        roots = jumped
+    _, labels = np.unique(roots, return_inverse=True)
+    return labels
+
+
+class EdgeTimeline:
+    """
+    Transactions grouped by directed edge and sorted by time within each edge,
+    under one composite key (edge * 2^32 + seconds since the first
+    transaction). Counts and amounts of any edges over any time window are
+    two binary searches per edge plus a cumulative-sum difference.
+    """
+
+    SHIFT = 1 << 32  # Seconds offsets stay below this (~136 years); leaves room for 2^31 edges
+
+    def __init__(self, src: np.ndarray, dst: np.ndarray, times: np.ndarray, amounts: np.ndarray, n_nodes: int):
+        pairs, edge_of_tx = np.unique(src * n_nodes + dst, return_inverse=True)
+        self.edge_src = pairs // n_nodes
+        self.edge_dst = pairs % n_nodes
+        self.t0 = int(times.min()) if len(times) else 0
+        self.t1 = int(times.max()) if len(times) else 0
+
+        order = np.lexsort((times, edge_of_tx))
+        self.edge = edge_of_tx[order]
+        self.times = times[order]
+        self.keys = self.edge * self.SHIFT + (self.times - self.t0)
+        self.cum_amounts = np.r_[0.0, np.cumsum(amounts[order])]
+
+    def bounds(self, edges: np.ndarray, start: Optional[int], end: Optional[int]):
+        """[lo, hi) positions of each edge's transactions with start <= t <= end."""
+        lo_off = 0 if start is None else min(max(start - self.t0, 0), self.SHIFT - 1)
+        hi_off = self.SHIFT - 1 if end is None else min(end - self.t0, self.SHIFT - 1)
+        lo = np.searchsorted(self.keys, edges * self.SHIFT + lo_off, side="left")
+        if hi_off < 0:
+            return lo, lo
+        hi = np.searchsorted(self.keys, edges * self.SHIFT + hi_off, side="right")
+        return lo, np.maximum(hi, lo)
+
+    def amounts(self, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        return self.cum_amounts[hi] - self.cum_amounts[lo]
+
+    def positions(self, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        """Every transaction position inside the [lo, hi) ranges."""
+        counts = hi - lo
+        starts = np.repeat(lo - np.r_[0, np.cumsum(counts)[:-1]], counts)
+        return starts + np.arange(counts.sum())
+
+
+class CompactGraph:
+    """
+    Integer-encoded view of a batch: one entry per transaction in `src`/`dst`
+    (indices into `node_ids`), `amounts` and `times` (epoch seconds), plus
+    the weakly connected component of every node. Graphs saved before
+    amounts / times were kept have None there.
+    """
+
+    def __init__(self, node_ids: np.ndarray, src: np.ndarray, dst: np.ndarray,
+                 labels: Optional[np.ndarray] = None, sizes: Optional[np.ndarray] = None,
+                 amounts: Optional[np.ndarray] = None, times: Optional[np.ndarray] = None):
+        self.node_ids = node_ids
+        self.src = src
+        self.dst = dst
+        self.amounts = amounts
+        self.times = times
+        if labels is None:
+            labels = union_find_labels(len(node_ids), src, dst)
+        if sizes is None:
+            sizes = np.bincount(labels, minlength=labels.max() + 1 if len(labels) else 0)
+        self.labels = labels
+        self.sizes = sizes
+        self._index = None
+        self._timeline = None
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "CompactGraph":
+        # FR-11: Self-loops carry no flow, same as build_graph
+        df = df[df["sender_id"] != df["receiver_id"]]
+        codes, uniques = pd.factorize(pd.concat([df["sender_id"], df["receiver_id"]], ignore_index=True))
+        n = len(df)
+        node_ids = np.asarray(uniques, dtype=str)
+        return cls(node_ids, codes[:n].astype(np.int64), codes[n:].astype(np.int64),
+                   amounts=df["amount"].to_numpy(dtype=np.float64),
+                   times=pd.to_datetime(df["timestamp"]).to_numpy().astype("datetime64[s]").astype(np.int64))
+
+    @property
+    def index(self) -> dict:
+        """account_id -> node index, built on first use."""
+        if self._index is None:
+            self._index = {nid: i for i, nid in enumerate(self.node_ids.tolist())}
+        return self._index
+
+    @property
+    def timeline(self) -> Optional[EdgeTimeline]:
+        """Per-edge, time-sorted transactions, built on first use (None without times)."""
+        if self._timeline is None and self.times is not None:
+            amounts = self.amounts if self.amounts is not None else np.zeros(len(self.times))
+            self._timeline = EdgeTimeline(self.src, self.dst, self.times, amounts, len(self.node_ids))
+        return self._timeline
+
+    def cluster_sizes(self) -> dict:
+        """account_id -> size of its weakly connected component."""
+        return dict(zip(self.node_ids.tolist(), self.sizes[self.labels].tolist()))
+
+    def component_label(self, node_id: str) -> Optional[int]:
+        idx = self.index.get(node_id)
+        return None if idx is None else int(self.labels[idx])
+
+    def save(self, batch_id: str) -> Path:
+        out_dir = artifact_dir(batch_id)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        path = out_dir / GRAPH_FILE
+        extra = {k: v for k, v in (("amounts", self.amounts), ("times", self.times)) if v is not None}
+        np.savez_compressed(path, node_ids=self.node_ids, src=self.src, dst=self.dst,
+                            labels=self.labels, sizes=self.sizes, **extra)
+        return path
+
+    @classmethod
+    def load(cls, batch_id: str) -> Optional["CompactGraph"]:
+        """
+        Saved compact graph of a batch. Kept in memory until the file changes,
+        so repeated investigation requests (and the boot warm-up) share one copy.
+        """
+        path = artifact_dir(batch_id) / GRAPH_FILE
+        if not path.exists():
+            return None
+        mtime = os.path.getmtime(path)
+        hit = _loaded.get(batch_id)
+        if hit is not None and hit[0] == mtime:
+            _loaded.move_to_end(batch_id)
+            return hit[1]
+
+        with np.load(path) as data:
+            optional = {k: data[k] for k in ("amounts", "times") if k in data.files}
+            graph = cls(data["node_ids"], data["src"], data["dst"], data["labels"], data["sizes"], **optional)
+        _loaded[batch_id] = (mtime, graph)
+        while len(_loaded) > LOADED_CACHE_SIZE:
+            _loaded.popitem(last=False)
+        return graph
+
+
+# batch_id -> (graph.npz mtime, CompactGraph)
+_loaded: "OrderedDict[str, tuple]" = OrderedDict()
@@ -1,19 +1,28 @@
 
+import heapq
 import networkx as nx
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from app.rules import current_rules
 
-def detect_cycles(G: nx.DiGraph) -> List[List[str]]:
+def detect_cycles(G: nx.DiGraph, hubs: Dict[str, dict] = None,
+                  min_len: int = None, max_len: int = None) -> List[List[str]]:
     """
     Detects circular money flows of length 3-5 with CHRONOLOGICAL constraints.
-    Rule: T(A->B) < T(B->C) < ... < T(Z->A)
+    Rule: T(A->B) < T(B->C) < ... < T(Z->A), closing within cycle_horizon_hours of T(A->B)
+    Hubs (see app.hubs) are excluded, only closed into, or expanded through at most
+    hub_expansion_cap earliest next hops, per hub_policy, which bounds the branching factor.
+    min_len / max_len override the rules' cycle lengths for this call only.
     """
     cycles = []
-    min_len = current_rules.min_cycle_length
-    max_len = current_rules.max_cycle_length
+    min_len = current_rules.min_cycle_length if min_len is None else min_len
+    max_len = current_rules.max_cycle_length if max_len is None else max_len
+    horizon = current_rules.cycle_horizon_hours * 3600
+    hubs = hubs or {}
+    policy = current_rules.hub_policy
+    cap = current_rules.hub_expansion_cap
     
-    def temporal_dfs(path: List[str], current_time: float, visited_edges: set):
+    def temporal_dfs(path: List[str], current_time: float, start_time: float, visited_edges: set):
         curr = path[-1]
         
         # Prune depth
@@ -30,39 +39,54 @@ def detect_cycles(G: nx.DiGraph) -> List[List[str]]:
                 # Get earliest timestamp greater than current_time
                 valid_closing = False
                 for ts in edge_data.get('timestamps', []):
-                    if ts.timestamp() > current_time:
+                    if current_time < ts.timestamp() <= start_time + horizon:
                         valid_closing = True
                         break
                 
                 if valid_closing:
                     cycles.append(path + [start_node])
+
+        # Hubs are endpoints only unless the policy allows capped expansion
+        is_hub = curr in hubs
+        if is_hub and policy != "cap":
+            return
         
-        # Explore neighbors
+        # Collect neighbors reachable in time
+        next_hops = []
         for neighbor in G.successors(curr):
             if neighbor in path: continue # internal loop, not simple cycle
+            if policy == "exclude" and neighbor in hubs: continue
             
             # Check edge time constraint
             edge_data = G[curr][neighbor]
-            valid_timestamps = [t.timestamp() for t in edge_data.get('timestamps', []) if t.timestamp() > current_time]
+            valid_timestamps = [t.timestamp() for t in edge_data.get('timestamps', []) if current_time < t.timestamp() <= start_time + horizon]
             
             if valid_timestamps:
                 # Continue DFS with the earliest valid next timestamp
-                next_time = min(valid_timestamps)
-                # Avoid re-traversing same edge in same DFS branch? 
-                # For simplified detection, we just proceed.
-                temporal_dfs(path + [neighbor], next_time, visited_edges)
+                next_hops.append((min(valid_timestamps), neighbor))
+
+        if is_hub:
+            next_hops = heapq.nsmallest(cap, next_hops)
+
+        for next_time, neighbor in next_hops:
+            # Avoid re-traversing same edge in same DFS branch? 
+            # For simplified detection, we just proceed.
+            temporal_dfs(path + [neighbor], next_time, start_time, visited_edges)
 
     # Start DFS from each node
     # Optimization: Sort edges by time and only start from valid sequences?
     # For now, iterate all nodes.
-    import pandas as pd
     for node in G.nodes():
+        if node in hubs and policy != "cap":
+            continue
         # Start with an initial time of 0 (or very old)
         # Actually, we need to pick an OUTGOING edge to start the chain.
         for neighbor in G.successors(node):
+            if policy == "exclude" and neighbor in hubs:
+                continue
             edge_data = G[node][neighbor]
             for ts in edge_data.get('timestamps', []):
-                temporal_dfs([node, neighbor], ts.timestamp(), set())
+                temporal_dfs([node, neighbor], ts.timestamp(), ts.timestamp(), set())
                 
     # Deduplicate cycles (A-B-C-A is same as B-C-A-B)
     unique_cycles = []
@@ -126,16 +150,20 @@ def detect_commission(G: nx.DiGraph, cycles: List[List[str]]) -> List[str]:
                 
     return list(commission_suspects)
 
-def _calculate_dynamic_threshold(degrees: List[int], absolute_min: int, sigma: float) -> float:
+def _calculate_dynamic_threshold(degrees: List[int], absolute_min: int, sigma: float,
+                                 stats: Tuple[float, float] = None) -> float:
     """
     Calculates a threshold based on statistical distribution (Mean + Sigma*StdDev).
     Ensures it never falls below the absolute_min.
+    `stats` supplies an estimated (mean, std) instead of the degree list.
     """
-    if not degrees:
+    if stats is not None:
+        mean, std = stats
+    elif not degrees:
         return absolute_min
-    
-    mean = np.mean(degrees)
-    std = np.std(degrees)
+    else:
+        mean = np.mean(degrees)
+        std = np.std(degrees)
     statistical_limit = mean + (std * sigma)
     
     return max(absolute_min, statistical_limit)
@@ -163,16 +191,19 @@ def _count_in_time_window(timestamps: List, window_hours: int) -> int:
 def _extract_timestamps(G: nx.DiGraph, u: str, v: str) -> List:
     return G[u][v].get('timestamps', [])
 
-def detect_fan_out(G: nx.DiGraph) -> Dict[str, dict]:
+def detect_fan_out(G: nx.DiGraph, candidates: set = None, degree_stats: Tuple[float, float] = None) -> Dict[str, dict]:
     """
     Detects high fan-out (1 -> Many) with TEMPORAL concentration using functional patterns.
+    With `candidates` (sketch mode) only those accounts get the exact window count;
+    `degree_stats`, an estimated (mean, std) out-degree, replaces the exact degrees in the threshold.
     """
     # 1. Calculate Threshold
-    all_out_degrees = [d for _, d in G.out_degree()]
+    all_out_degrees = [d for _, d in G.out_degree()] if degree_stats is None else None
     threshold = _calculate_dynamic_threshold(
         all_out_degrees, 
         current_rules.fan_out_threshold, 
-        current_rules.degree_outlier_sigma
+        current_rules.degree_outlier_sigma,
+        degree_stats,
     )
 
     # 2. Functional Detection
@@ -184,27 +215,30 @@ def detect_fan_out(G: nx.DiGraph) -> Dict[str, dict]:
         return (node, count, out_edges)
 
     # Filter candidates exceeding threshold
-    candidates = map(analyze_node, G.nodes())
+    nodes = G.nodes() if candidates is None else [n for n in candidates if G.has_node(n)]
+    results = map(analyze_node, nodes)
     suspects = {
         node: {
             "fan_out_count": count,
             "threshold_used": float(round(threshold, 2)),
             "targets": [v for _, v in edges]
         }
-        for node, count, edges in candidates if count >= threshold
+        for node, count, edges in results if count >= threshold
     }
     
     return suspects
 
-def detect_fan_in(G: nx.DiGraph) -> Dict[str, dict]:
+def detect_fan_in(G: nx.DiGraph, candidates: set = None, degree_stats: Tuple[float, float] = None) -> Dict[str, dict]:
     """
     Detects high fan-in (Many -> 1) with TEMPORAL concentration using functional patterns.
+    Accepts sketch `candidates` / `degree_stats` like detect_fan_out.
     """
-    all_in_degrees = [d for _, d in G.in_degree()]
+    all_in_degrees = [d for _, d in G.in_degree()] if degree_stats is None else None
     threshold = _calculate_dynamic_threshold(
         all_in_degrees, 
         current_rules.fan_in_threshold, 
-        current_rules.degree_outlier_sigma
+        current_rules.degree_outlier_sigma,
+        degree_stats,
     )
 
     def analyze_node(node):
@@ -213,29 +247,31 @@ def detect_fan_in(G: nx.DiGraph) -> Dict[str, dict]:
         count = _count_in_time_window(all_timestamps, current_rules.temporal_window_hours)
         return (node, count, in_edges)
 
-    candidates = map(analyze_node, G.nodes())
+    nodes = G.nodes() if candidates is None else [n for n in candidates if G.has_node(n)]
+    results = map(analyze_node, nodes)
     suspects = {
         node: {
             "fan_in_count": count,
             "threshold_used": float(round(threshold, 2)),
             "sources": [u for u, _ in edges]
         }
-        for node, count, edges in candidates if count >= threshold
+        for node, count, edges in results if count >= threshold
     }
     
     return suspects
 
-def detect_layered_shells(G: nx.DiGraph) -> List[List[str]]:
+def detect_layered_shells(G: nx.DiGraph, hubs: Dict[str, dict] = None) -> List[List[str]]:
     """
     Detects chains of 3+ hops where intermediate nodes have low activity.
-    Uses functional filtering for candidate selection.
+    Uses functional filtering for candidate selection; hubs never qualify.
     """
+    hubs = hubs or {}
     min_hops = current_rules.shell_min_hops
     max_tx = current_rules.shell_max_intermediate_tx
     
     # 1. Identify "Shell Candidates" via filter
     # Node is candidate if total degree <= max_tx
-    shell_candidates = [n for n in G.nodes() if G.degree(n) <= max_tx]
+    shell_candidates = [n for n in G.nodes() if G.degree(n) <= max_tx and n not in hubs]
             
     if not shell_candidates:
         return []
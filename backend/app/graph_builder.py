@@ -1,5 +1,8 @@
 
+from typing import Optional
+
 import networkx as nx
+import numpy as np
 import pandas as pd
 
 def build_graph(df: pd.DataFrame) -> nx.DiGraph:
@@ -34,48 +37,76 @@ def build_graph(df: pd.DataFrame) -> nx.DiGraph:
     return G
 
 
-def get_component_graph(G: nx.DiGraph, node_id: str, max_nodes: int = 50) -> dict:
+def _closest_nodes(focus: int, src: np.ndarray, dst: np.ndarray, max_nodes: int) -> np.ndarray:
+    """Breadth-first (undirected) from `focus` over edge arrays, keeping at most max_nodes."""
+    visited = frontier = np.array([focus])
+    while frontier.size and len(visited) < max_nodes:
+        reached = np.r_[dst[np.isin(src, frontier)], src[np.isin(dst, frontier)]]
+        frontier = np.setdiff1d(reached, visited)[:max_nodes - len(visited)]
+        visited = np.r_[visited, frontier]
+    return visited
+
+
+def get_window_graph(compact, node_id: str, start: Optional[int] = None, end: Optional[int] = None,
+                     max_nodes: int = 50, buckets: int = 48) -> dict:
     """
-    Returns the Weakly Connected Component (cluster) containing the node.
-    Limits to max_nodes using BFS if the component is too large.
+    Component of `node_id` as seen through transactions with start <= t <= end
+    (epoch seconds, None = open). Answered from the compact graph's edge
+    timeline by binary search, so no graph is built: only edges active in the
+    window appear, each with its count, amount and first / last timestamp,
+    plus a `buckets`-long activity series over the window for playback.
     """
-    if node_id not in G:
-        return {"nodes": [], "links": []}
-        
-    # 1. Get Weakly Connected Component
-    # This includes all nodes reachable from node_id or that can reach node_id in undirected sense
-    undirected_G = G.to_undirected()
-    if node_id not in undirected_G:
-         return {"nodes": [], "links": []}
+    focus = compact.index.get(node_id)
+    timeline = compact.timeline
+    if focus is None or timeline is None:
+        return {"nodes": [], "links": [], "activity": None}
 
-    component_nodes = set(nx.node_connected_component(undirected_G, node_id))
-    
-    # 2. Prune if too large (Prioritize closer nodes via BFS)
-    if len(component_nodes) > max_nodes:
-        # Perform BFS from node_id to keep the 'closest' max_nodes
-        bfs_tree = nx.bfs_tree(undirected_G, source=node_id, depth_limit=None)
-        # Take first max_nodes from BFS
-        truncated_nodes = list(bfs_tree.nodes())[:max_nodes]
-        component_nodes = set(truncated_nodes)
-        
-    # 3. Extract Subgraph
-    subgraph = G.subgraph(component_nodes)
-    
-    # 4. Format for D3
-    # Calculate degree for sizing
-    degrees = dict(subgraph.degree())
-    
-    nodes = []
-    for n in subgraph.nodes():
-        # Determine group/style
-        # Ideally we'd pass in the 'suspects' list to color them, 
-        # but for now we default to 'related' and let frontend handle specific ID highlighting
-        nodes.append({
-            "id": n, 
-            "r": 5 + (degrees.get(n, 0) * 0.5), # Dynamic size based on local degree
-            "group": "related" 
-        })
-        
-    links = [{"source": u, "target": v} for u, v in subgraph.edges()]
-    
-    return {"nodes": nodes, "links": links}
+    # 1. The component's edges, narrowed to those active in the window
+    edges = np.flatnonzero(compact.labels[timeline.edge_src] == compact.labels[focus])
+    lo, hi = timeline.bounds(edges, start, end)
+    active = hi > lo
+    edges, lo, hi = edges[active], lo[active], hi[active]
+    src, dst = timeline.edge_src[edges], timeline.edge_dst[edges]
+
+    # 2. Prune if too large (closest accounts first)
+    kept = _closest_nodes(focus, src, dst, max_nodes)
+    inside = np.isin(src, kept) & np.isin(dst, kept)
+    edges, lo, hi, src, dst = edges[inside], lo[inside], hi[inside], src[inside], dst[inside]
+
+    # 3. Format for D3
+    degrees = np.bincount(np.r_[src, dst], minlength=len(compact.node_ids))[kept].tolist()
+    ids = compact.node_ids
+    nodes = [{"id": str(ids[n]), "r": 5 + d * 0.5, "group": "related"} for n, d in zip(kept.tolist(), degrees)]
+    counts = (hi - lo).tolist()
+    amounts = timeline.amounts(lo, hi).tolist()
+    first, last = timeline.times[lo].tolist(), timeline.times[hi - 1].tolist()
+    links = [
+        {"source": str(ids[u]), "target": str(ids[v]), "count": c, "amount": round(a, 2), "first": f, "last": l}
+        for u, v, c, a, f, l in zip(src.tolist(), dst.tolist(), counts, amounts, first, last)
+    ]
+
+    # 4. Activity series: transactions per time bucket across the window
+    pos = timeline.positions(lo, hi)
+    times = timeline.times[pos]
+    window_start = start if start is not None else (int(times.min()) if len(times) else timeline.t0)
+    window_end = end if end is not None else (int(times.max()) if len(times) else timeline.t1)
+    # An empty window past (or before) the data: the open end echoes the requested bound, so `to` never precedes `from`
+    if start is None:
+        window_start = min(window_start, window_end)
+    else:
+        window_end = max(window_end, window_start)
+    width = max(1, -(-(window_end - window_start + 1) // buckets))
+    bucket = np.clip((times - window_start) // width, 0, buckets - 1)
+    tx_amounts = timeline.cum_amounts[pos + 1] - timeline.cum_amounts[pos]
+
+    return {
+        "nodes": nodes,
+        "links": links,
+        "window": {"from": window_start, "to": window_end},
+        "activity": {
+            "start": window_start,
+            "bucket_seconds": int(width),
+            "counts": np.bincount(bucket, minlength=buckets).tolist(),
+            "amounts": np.round(np.bincount(bucket, weights=tx_amounts, minlength=buckets), 2).tolist(),
+        },
+    }
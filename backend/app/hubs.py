@@ -0,0 +1,60 @@
+from typing import Dict
+
+import networkx as nx
+import numpy as np
+
+from app.rules import current_rules
+
+HUB_ROLE_RATIO = 4  # One direction this many times the other marks a one-sided hub
+
+
+def _role(in_degree: int, out_degree: int) -> str:
+    # Same intuition as the merchant deduction (many payers, no onward flow)
+    # and the "websites" cluster (one account paying many)
+    if in_degree >= HUB_ROLE_RATIO * out_degree:
+        return "merchant"
+    if out_degree >= HUB_ROLE_RATIO * in_degree:
+        return "distributor"
+    return "exchange"
+
+
+def classify_hubs(G: nx.DiGraph) -> Dict[str, dict]:
+    """
+    Flags accounts whose counterparty count or transaction volume sits above
+    the configured percentile (and the absolute floor). Each entry records how
+    the cycle and shell searches treat the hub under the current policy.
+    """
+    if G.number_of_nodes() == 0:
+        return {}
+
+    nodes = list(G.nodes())
+    degrees = np.array([G.degree(n) for n in nodes])
+    volumes = np.array([
+        sum(len(d.get("timestamps", [])) for _, _, d in G.out_edges(n, data=True)) +
+        sum(len(d.get("timestamps", [])) for _, _, d in G.in_edges(n, data=True))
+        for n in nodes
+    ])
+
+    degree_limit = max(current_rules.hub_min_degree, np.percentile(degrees, current_rules.hub_degree_percentile))
+    volume_limit = max(current_rules.hub_min_degree, np.percentile(volumes, current_rules.hub_volume_percentile))
+
+    hubs = {}
+    for n, degree, volume in zip(nodes, degrees.tolist(), volumes.tolist()):
+        if degree < degree_limit and volume < volume_limit:
+            continue
+
+        out_degree = G.out_degree(n)
+        if current_rules.hub_policy == "cap":
+            skipped = max(0, out_degree - current_rules.hub_expansion_cap)
+        else:
+            skipped = out_degree
+
+        hubs[n] = {
+            "role": _role(G.in_degree(n), out_degree),
+            "degree": degree,
+            "tx_count": volume,
+            "reason": "degree" if degree >= degree_limit else "volume",
+            "treatment": current_rules.hub_policy,
+            "max_successors_skipped": skipped,
+        }
+    return hubs
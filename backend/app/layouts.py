@@ -0,0 +1,192 @@
+import gzip
+import json
+from typing import Iterable, Optional
+
+import networkx as nx
+import numpy as np
+
+from app.compact_graph import CompactGraph
+from app.storage import artifact_dir
+
+LAYOUT_DIR = "layouts"
+FULL_LAYOUT_LIMIT = 300   # Scopes up to this many accounts are laid out node-by-node
+CANVAS_SIZE = 1000.0      # Coordinates are normalized to [0, CANVAS_SIZE]
+LAYOUT_SEED = 42          # Fixed seed so a cached layout can always be reproduced
+
+
+def _layout_path(batch_id: str, key: str, suffix: str):
+    return artifact_dir(batch_id) / LAYOUT_DIR / f"{key}{suffix}"
+
+
+def _scope_edges(compact: CompactGraph, scope: np.ndarray):
+    """
+    Unique directed edges (local indices into `scope`) with transaction counts.
+    """
+    in_scope = np.zeros(len(compact.node_ids), dtype=bool)
+    in_scope[scope] = True
+    mask = in_scope[compact.src] & in_scope[compact.dst]
+    if not mask.any():
+        return np.empty((0, 2), dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    pairs = np.stack([compact.src[mask], compact.dst[mask]], axis=1)
+    pairs, counts = np.unique(pairs, axis=0, return_counts=True)
+    # scope is sorted, so searchsorted maps global -> local index
+    return np.searchsorted(scope, pairs), counts
+
+
+def _positions(n: int, pairs: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """Force-directed positions for n nodes, scaled onto the canvas."""
+    if n == 1:
+        return np.array([[CANVAS_SIZE / 2, CANVAS_SIZE / 2]])
+
+    G = nx.Graph()
+    G.add_nodes_from(range(n))
+    w = weights if weights is not None else np.ones(len(pairs))
+    G.add_weighted_edges_from((int(u), int(v), float(c)) for (u, v), c in zip(pairs, w))
+
+    if n <= FULL_LAYOUT_LIMIT:
+        pos = nx.spring_layout(G, seed=LAYOUT_SEED)
+    else:
+        # Too many super-nodes for a force layout: a ring keeps it linear
+        pos = nx.circular_layout(G)
+    coords = np.array([pos[i] for i in range(n)])
+
+    # Normalize to the canvas with a small margin
+    lo, hi = coords.min(axis=0), coords.max(axis=0)
+    span = np.where(hi - lo > 0, hi - lo, 1.0)
+    return (coords - lo) / span * (CANVAS_SIZE * 0.9) + CANVAS_SIZE * 0.05
+
+
+def _partition(n: int, pairs: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+    Splits a large scope into communities (super-nodes).
+    Falls back to BFS-ordered chunks when no community structure exists.
+    """
+    G = nx.Graph()
+    G.add_nodes_from(range(n))
+    G.add_weighted_edges_from((int(u), int(v), float(c)) for (u, v), c in zip(pairs, counts))
+
+    groups = np.zeros(n, dtype=np.int64)
+    communities = nx.community.louvain_communities(G, seed=LAYOUT_SEED)
+    if len(communities) > 1:
+        for gid, members in enumerate(sorted(communities, key=len, reverse=True)):
+            groups[list(members)] = gid
+        return groups
+
+    order = [0] + [v for _, v in nx.bfs_edges(G, 0)]
+    for pos, node in enumerate(order):
+        groups[node] = pos // FULL_LAYOUT_LIMIT
+    return groups
+
+
+def _build_payload(compact: CompactGraph, key: str, scope: np.ndarray):
+    """
+    Returns (payload, groups). `groups` maps each scope member to its super-node
+    and is None when the scope was small enough to lay out in full.
+    """
+    pairs, counts = _scope_edges(compact, scope)
+    n = len(scope)
+
+    if n <= FULL_LAYOUT_LIMIT:
+        groups = None
+        ids = compact.node_ids[scope].tolist()
+        degree = np.bincount(pairs.ravel(), minlength=n) if len(pairs) else np.zeros(n, dtype=np.int64)
+        sizes = np.ones(n, dtype=np.int64)
+        radius = np.minimum(5 + degree * 0.5, 30)
+        links, link_counts = pairs, counts
+    else:
+        # Level of detail: one super-node per community, edges aggregated between them
+        groups = _partition(n, pairs, counts)
+        k = int(groups.max()) + 1
+        ids = [f"{key}.{g}" for g in range(k)]
+        sizes = np.bincount(groups, minlength=k)
+        radius = 8 + 4 * np.log2(sizes)
+        gp = groups[pairs] if len(pairs) else np.empty((0, 2), dtype=np.int64)
+        keep = gp[:, 0] != gp[:, 1]
+        if keep.any():
+            links, inverse = np.unique(gp[keep], axis=0, return_inverse=True)
+            # Weight aggregated links by the transactions they carry, not the edges
+            link_counts = np.bincount(inverse.ravel(), weights=counts[keep]).astype(np.int64)
+        else:
+            links, link_counts = np.empty((0, 2), dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    xy = _positions(len(ids), links, link_counts)
+    payload = {
+        "key": key,
+        "lod": groups is not None,
+        "total_nodes": n,
+        "ids": ids,
+        "x": np.round(xy[:, 0], 1).tolist(),
+        "y": np.round(xy[:, 1], 1).tolist(),
+        "r": np.round(radius, 1).tolist(),
+        "size": sizes.tolist(),
+        # Flat [source, target, tx_count, ...] triplets indexing into `ids`
+        "links": np.column_stack([links, link_counts]).ravel().astype(int).tolist() if len(links) else [],
+    }
+    return payload, groups
+
+
+def _resolve_scope(compact: CompactGraph, batch_id: str, key: str) -> np.ndarray:
+    """
+    Maps a layout key to its member node indices.
+    `c<label>` is a whole component; each `.g` suffix narrows to super-node g of the parent.
+    Raises KeyError when a parent in the key has no super-nodes.
+    """
+    parts = key.split(".")
+    scope = np.flatnonzero(compact.labels == int(parts[0][1:]))
+    for depth, part in enumerate(parts[1:], start=1):
+        parent_key = ".".join(parts[:depth])
+        groups_path = _layout_path(batch_id, parent_key, ".groups.npy")
+        if not groups_path.exists():
+            get_layout(compact, batch_id, parent_key)
+        if not groups_path.exists():
+            # The parent was laid out in full: it has no super-nodes to expand
+            raise KeyError(key)
+        groups = np.load(groups_path)
+        scope = scope[groups == int(part)]
+    return scope
+
+
+def get_layout(compact: CompactGraph, batch_id: str, key: str) -> bytes:
+    """
+    Returns the gzipped JSON layout for `key`, computing and caching it on first use.
+    """
+    path = _layout_path(batch_id, key, ".json.gz")
+    if path.exists():
+        return path.read_bytes()
+
+    scope = _resolve_scope(compact, batch_id, key)
+    if len(scope) == 0:
+        raise KeyError(key)
+
+    payload, groups = _build_payload(compact, key, scope)
+    body = gzip.compress(json.dumps(payload, separators=(",", ":")).encode())
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if groups is not None:
+        np.save(_layout_path(batch_id, key, ".groups.npy"), groups)
+    path.write_bytes(body)
+    return body
+
+
+def focus_key(compact: CompactGraph, batch_id: str, node_id: str) -> Optional[str]:
+    """
+    The id under which `node_id` appears in its component's top-level layout:
+    the account itself, or the super-node that collapses it.
+    """
+    label = compact.component_label(node_id)
+    if label is None:
+        return None
+    key = f"c{label}"
+    groups_path = _layout_path(batch_id, key, ".groups.npy")
+    if not groups_path.exists():
+        return node_id
+    scope = np.flatnonzero(compact.labels == label)
+    local = np.searchsorted(scope, compact.index[node_id])
+    return f"{key}.{int(np.load(groups_path)[local])}"
+
+
+def precompute_layouts(compact: CompactGraph, batch_id: str, labels: Iterable[int]):
+    """Lays out the given components ahead of the first investigation request."""
+    for label in sorted(set(labels)):
+        get_layout(compact, batch_id, f"c{label}")
@@ -0,0 +1,259 @@
+"""
+Temporal motif engine: one pass over the time-sorted transactions finds
+every instance of several small motifs at once.
+
+A motif is declared as edges between variables ("s>m1"), an optional partial
+order between those edges (default: the listed order) and a window delta:
+all its transactions must fall within `delta_seconds` of the first one.
+
+All orderings of all motifs are compiled into one prefix trie, so motifs
+that begin the same way share their partial matches. Partial matches wait
+on the account their next edge must leave from (or arrive at), so each
+transaction only touches the matches it can extend.
+
+Hubs follow the cycle search's hub_policy: "exclude" drops their
+transactions, "endpoint" lets a match bind a hub but never wait on one, and
+"cap" keeps only the hub_expansion_cap most recent matches waiting on it.
+"""
+import itertools
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.rules import current_rules
+
+MAX_ORDERINGS = 720        # Linear extensions compiled per motif
+MAX_INSTANCES = 10000      # Instances kept per motif (all are counted)
+MAX_WAITING = 2000         # Partial matches kept per account; the oldest are dropped beyond this
+SWEEP_EVERY = 50000        # Transactions between sweeps of expired partial matches
+
+
+class MotifSpec:
+    """
+    Compact declaration of a temporal motif.
+    `edges` like ["s>m1", "s>m2", "m1>t", "m2>t"]; `order` lists (i, j) pairs
+    meaning edge i happens before edge j (None = the listed order).
+    """
+
+    def __init__(self, name: str, edges: Sequence[str], delta_seconds: float,
+                 order: Optional[Sequence[Tuple[int, int]]] = None):
+        self.name = name
+        self.delta_seconds = float(delta_seconds)
+        self.variables: List[str] = []
+        self.edges: List[Tuple[int, int]] = []
+        for edge in edges:
+            a, b = (part.strip() for part in edge.split(">"))
+            if a == b:
+                raise ValueError(f"{name}: self-loop {edge} is never a transaction")
+            for var in (a, b):
+                if var not in self.variables:
+                    self.variables.append(var)
+            self.edges.append((self.variables.index(a), self.variables.index(b)))
+        if order is None:
+            order = [(i, i + 1) for i in range(len(self.edges) - 1)]
+        self.order = [tuple(pair) for pair in order]
+
+    def orderings(self) -> List[Tuple[int, ...]]:
+        """Every time order of the edges consistent with `order`."""
+        before = {j: {i for i, k in self.order if k == j} for j in range(len(self.edges))}
+        out = []
+        for perm in itertools.permutations(range(len(self.edges))):
+            seen = set()
+            for e in perm:
+                if not before[e] <= seen:
+                    break
+                seen.add(e)
+            else:
+                out.append(perm)
+                if len(out) > MAX_ORDERINGS:
+                    raise ValueError(f"{self.name}: more than {MAX_ORDERINGS} edge orderings")
+        return out
+
+
+def default_motifs() -> List[MotifSpec]:
+    """Motifs run by the pipeline, windows taken from the current rules."""
+    window = current_rules.motif_window_hours * 3600
+    return [
+        # One source fans out to two accounts that both forward to one sink
+        MotifSpec("scatter_gather", ["s>m1", "s>m2", "m1>t", "m2>t"], window, order=[(0, 2), (1, 3)]),
+        # Money in, then straight back out
+        MotifSpec("pass_through", ["a>b", "b>c"], current_rules.pass_through_minutes * 60),
+        # A fan-out whose branches close a cycle back to the source
+        MotifSpec("fan_then_cycle", ["s>m1", "s>m2", "m1>m2", "m2>s"], window, order=[(0, 2), (2, 3), (1, 3)]),
+    ]
+
+
+class _TrieNode:
+    __slots__ = ("transitions", "terminals", "n_vars", "max_delta", "waits")
+
+    def __init__(self, n_vars: int):
+        self.transitions = []   # (x, y, child): next edge from var x to var y (an index >= n_vars binds a new var)
+        self.terminals = []     # (spec index, canonical var index per spec var, delta)
+        self.n_vars = n_vars
+        self.max_delta = 0.0    # Longest window of any motif completing at or below this node
+        self.waits = ()         # (side, var): where partial matches at this node wait (0 = sender, 1 = receiver)
+
+
+def _compile(specs: List[MotifSpec]) -> _TrieNode:
+    """
+    Inserts every ordering of every spec into a trie keyed by edge patterns over
+    canonically numbered variables (numbered by first appearance).
+    """
+    root = _TrieNode(0)
+    for spec_idx, spec in enumerate(specs):
+        for perm in spec.orderings():
+            canon: Dict[int, int] = {}
+            node = root
+            path = [root]
+            for step, e in enumerate(perm):
+                a, b = spec.edges[e]
+                if step > 0 and a not in canon and b not in canon:
+                    raise ValueError(f"{spec.name}: edges must stay connected in every allowed order")
+                for var in (a, b):
+                    if var not in canon:
+                        canon[var] = len(canon)
+                x, y = canon[a], canon[b]
+                child = next((c for cx, cy, c in node.transitions if (cx, cy) == (x, y)), None)
+                if child is None:
+                    child = _TrieNode(len(canon))
+                    node.transitions.append((x, y, child))
+                node = child
+                path.append(node)
+            node.terminals.append((spec_idx, tuple(canon[v] for v in range(len(spec.variables))), spec.delta_seconds))
+            for n in path:
+                n.max_delta = max(n.max_delta, spec.delta_seconds)
+
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        node.waits = tuple(dict.fromkeys((0, x) if x < node.n_vars else (1, y) for x, y, _ in node.transitions))
+        stack.extend(child for _, _, child in node.transitions)
+    return root
+
+
+def find_motifs(df: pd.DataFrame, specs: List[MotifSpec], hubs: Optional[dict] = None,
+                max_instances: int = MAX_INSTANCES) -> Dict[str, dict]:
+    """
+    All instances of `specs` in one chronological pass over `df`.
+    Returns per motif: total count and up to `max_instances` instances
+    (variable -> account, transaction ids, start / end time).
+    """
+    root = _compile(specs)
+    results = {spec.name: {"count": 0, "instances": []} for spec in specs}
+    # Orderings of one motif can match the same transactions (e.g. swapped
+    # mules); such duplicates always complete on the same transaction
+    completed = [set() for _ in specs]
+
+    df = df[df["sender_id"] != df["receiver_id"]]
+    hubs = hubs or {}
+    if hubs and current_rules.hub_policy == "exclude":
+        df = df[~df["sender_id"].isin(hubs) & ~df["receiver_id"].isin(hubs)]
+    df = df.sort_values("timestamp", kind="stable")
+    if df.empty:
+        return results
+    codes, accounts = pd.factorize(pd.concat([df["sender_id"], df["receiver_id"]], ignore_index=True))
+    # Per-account cap on waiting matches (hubs get theirs from the policy)
+    hub_limit = current_rules.hub_expansion_cap if current_rules.hub_policy == "cap" else 0
+    limits = {code: hub_limit for code in np.flatnonzero(accounts.isin(list(hubs))).tolist()}
+    n = len(df)
+    src, dst = codes[:n].tolist(), codes[n:].tolist()
+    seconds = df["timestamp"].to_numpy().astype("datetime64[s]").astype(np.int64).tolist()
+    tx_ids = df["transaction_id"].astype(str).tolist()
+
+    # account -> partial matches whose next edge leaves from it (src) / arrives at it (dst)
+    # partial match: (trie node, bindings, first-edge time, edge positions)
+    waiting_src: Dict[int, list] = {}
+    waiting_dst: Dict[int, list] = {}
+
+    tables = (waiting_src, waiting_dst)
+
+    def register(node: _TrieNode, bindings: tuple, start: int, edges: tuple):
+        match = (node, bindings, start, edges)
+        for side, var in node.waits:
+            account = bindings[var]
+            bucket = tables[side].get(account)
+            if bucket is None:
+                if limits.get(account, 1):
+                    tables[side][account] = [match]
+                continue
+            bucket.append(match)
+            limit = limits.get(account, MAX_WAITING)
+            if len(bucket) > 2 * limit:
+                del bucket[:-limit]
+
+    def advance(child: _TrieNode, bindings: tuple, start: int, edges: tuple, t: int, pending: list):
+        for spec_idx, canon, delta in child.terminals:
+            if t - start <= delta:
+                key = tuple(sorted(edges))
+                if key in completed[spec_idx]:
+                    continue
+                completed[spec_idx].add(key)
+                out = results[specs[spec_idx].name]
+                out["count"] += 1
+                if len(out["instances"]) < max_instances:
+                    out["instances"].append({
+                        "accounts": {var: str(accounts[bindings[c]]) for var, c in zip(specs[spec_idx].variables, canon)},
+                        "transactions": [tx_ids[i] for i in edges],
+                        "start": int(seconds[edges[0]]),
+                        "end": int(t),
+                    })
+        if child.transitions:
+            pending.append((child, bindings, start, edges))
+
+    for i in range(n):
+        u, v, t = src[i], dst[i], seconds[i]
+        pending = []
+        for done in completed:
+            done.clear()
+
+        # 1. Extend partial matches waiting on this sender (next edge leaves a bound account)
+        bucket = waiting_src.get(u)
+        if bucket:
+            live = []
+            for node, b, start, edges in bucket:
+                if t - start > node.max_delta:
+                    continue
+                live.append((node, b, start, edges))
+                for x, y, child in node.transitions:
+                    if x >= len(b) or b[x] != u:
+                        continue
+                    if y < len(b):
+                        if b[y] == v:
+                            advance(child, b, start, edges + (i,), t, pending)
+                    elif v not in b:
+                        advance(child, b + (v,), start, edges + (i,), t, pending)
+            waiting_src[u] = live
+
+        # 2. ...and on this receiver (next edge arrives at a bound account from a new one)
+        bucket = waiting_dst.get(v)
+        if bucket:
+            live = []
+            for node, b, start, edges in bucket:
+                if t - start > node.max_delta:
+                    continue
+                live.append((node, b, start, edges))
+                for x, y, child in node.transitions:
+                    if x < len(b) or y >= len(b) or b[y] != v or u in b:
+                        continue
+                    advance(child, b + (u,), start, edges + (i,), t, pending)
+            waiting_dst[v] = live
+
+        # 3. Every transaction may start a match
+        for x, y, child in root.transitions:
+            advance(child, (u, v), t, (i,), t, pending)
+
+        for match in pending:
+            register(*match)
+
+        # 4. Drop expired matches on accounts that have gone quiet
+        if i % SWEEP_EVERY == SWEEP_EVERY - 1:
+            for table in tables:
+                for account in list(table):
+                    live = [m for m in table[account] if t - m[2] <= m[0].max_delta]
+                    if live:
+                        table[account] = live
+                    else:
+                        del table[account]
+
+    return results
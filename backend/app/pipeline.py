@@ -0,0 +1,416 @@
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Set, Tuple
+
+import pandas as pd
+
+from app.account_index import account_index, build_postings
+from app.account_profiles import detect_profile_risk, load_profiles
+from app.graph_builder import build_graph
+from app.detection_engine import detect_cycles, detect_fan_out, detect_fan_in, detect_layered_shells, detect_commission
+from app.scoring_engine import calculate_node_score
+from app.clustering import analyze_clusters
+from app.compact_graph import CompactGraph
+from app.hubs import classify_hubs
+from app.motifs import default_motifs, find_motifs
+from app.rings import RingMembership, consolidate_rings
+from app.sketches import sketch_candidates
+from app.stats import build_stats, save_stats
+from app.layouts import precompute_layouts
+from app import rules
+from app.rules import current_rules
+from app.schemas import DetectionResult, NodeScore
+from app.serialization import prime
+from app.storage import BUCKET_DIR
+
+STATE_CACHE_SIZE = 4  # Batches kept in memory for selective re-scoring
+
+
+class AnalysisState:
+    """
+    Intermediate outputs of every pipeline stage for one batch, plus the
+    rules they were computed with, so a rules change can rerun only what it touches.
+    """
+
+    def __init__(self, df: pd.DataFrame, batch_id: Optional[str] = None):
+        self.df = df
+        self.batch_id = batch_id or str(uuid.uuid4())
+        self.outputs = {}
+        self.rules = {}
+        self.timings = {}
+
+
+# 1. Stage Functions
+
+def _stage_graph(state: AnalysisState):
+    return build_graph(state.df)
+
+
+def _stage_compact(state: AnalysisState):
+    # Int-encoded arrays with union-find component labels
+    return CompactGraph.from_dataframe(state.df)
+
+
+def _stage_hubs(state: AnalysisState):
+    return classify_hubs(state.outputs["graph"])
+
+
+def _stage_cycles(state: AnalysisState):
+    return detect_cycles(state.outputs["graph"], state.outputs["hubs"])
+
+
+def _stage_sketch(state: AnalysisState):
+    # Sketch mode: approximate candidates so exact window counts run on few accounts
+    if not current_rules.sketch_mode:
+        return None
+    return sketch_candidates(state.df)
+
+
+def _stage_fan_out(state: AnalysisState):
+    sketch = state.outputs["sketch"]
+    if sketch is None:
+        return detect_fan_out(state.outputs["graph"])
+    return detect_fan_out(state.outputs["graph"], sketch["out"]["candidates"], sketch["out"]["degree_stats"])
+
+
+def _stage_fan_in(state: AnalysisState):
+    sketch = state.outputs["sketch"]
+    if sketch is None:
+        return detect_fan_in(state.outputs["graph"])
+    return detect_fan_in(state.outputs["graph"], sketch["in"]["candidates"], sketch["in"]["degree_stats"])
+
+
+def _stage_shells(state: AnalysisState):
+    return detect_layered_shells(state.outputs["graph"], state.outputs["hubs"])
+
+
+def _stage_commission(state: AnalysisState):
+    return detect_commission(state.outputs["graph"], state.outputs["cycles"])
+
+
+def _stage_profiles(state: AnalysisState):
+    # Dormant / new-account bursts: one join against the lifecycle index
+    return detect_profile_risk(state.df, load_profiles())
+
+
+def _stage_motifs(state: AnalysisState):
+    # Scatter-gather / pass-through / fan-then-cycle in one chronological pass
+    return find_motifs(state.df, default_motifs(), state.outputs["hubs"])
+
+
+def _stage_clusters(state: AnalysisState):
+    G = state.outputs["graph"]
+
+    # Legacy Clustering (Run early to inform scoring)
+    clusters = analyze_clusters(state.df)
+
+    # Enrich Clusters with Detection Flags & Graph Metrics
+    commission_set = set(state.outputs["commission"])
+    for category in ["mule_accounts", "suspected_distribution", "websites"]:
+        for node_obj in clusters.get(category, []):
+            nid = node_obj["id"]
+            node_obj["is_commission"] = nid in commission_set
+
+            # Calculate Fan-in/Fan-out Ratio
+            if G.has_node(nid):
+                in_deg = G.in_degree(nid)
+                out_deg = G.out_degree(nid)
+                # Ratio: High In / Low Out = High Ratio (Mule-like)
+                # Avoid division by zero
+                node_obj["fan_in_out_ratio"] = in_deg / (out_deg if out_deg > 0 else 0.1)
+            else:
+                node_obj["fan_in_out_ratio"] = 0
+    return clusters
+
+
+def _stage_scoring(state: AnalysisState):
+    G = state.outputs["graph"]
+    compact = state.outputs["compact"]
+    cycles = state.outputs["cycles"]
+    fan_out = state.outputs["fan_out"]
+    fan_in = state.outputs["fan_in"]
+    shells = state.outputs["shells"]
+    commissions = state.outputs["commission"]
+    profile_flags = state.outputs["profiles"]
+    cluster_mule_ids = {m["id"] for m in state.outputs["clusters"]["mule_accounts"]}
+
+    # Cluster Sizes come from the union-find component labels
+    node_to_cluster_size = compact.cluster_sizes()
+
+    node_scores = []
+    for node in G.nodes():
+        score = calculate_node_score(node, cycles, fan_out, fan_in, shells, commissions, profile_flags)
+
+        # Force inclusion if flagged by clustering (Mule)
+        is_cluster_mule = node in cluster_mule_ids
+        # A profile flag alone rides on top of the heuristic floor rather than replacing it
+        profile_points = current_rules.score_profile_risk * current_rules.weight_profile if node in profile_flags else 0.0
+        if is_cluster_mule and score <= profile_points:
+            score = min(100.0, 50.0 + score) # Assign a base risk score for heuristic mules
+
+        if score > 0:
+            is_mule = (node in fan_in) or is_cluster_mule
+            is_originator = node in fan_out
+
+            details = {
+                "cycles": 1 if any(node in c for c in cycles) else 0,
+                "smurfing": 1 if (is_originator or is_mule) else 0,
+                "shells": 1 if any(node in s for s in shells) else 0,
+                "profile": profile_flags[node]["pattern"] if node in profile_flags else None,
+                "role": "Mule" if is_mule else ("Originator" if is_originator else "Participant"),
+                "degree": int(G.degree(node)),
+                "cluster_size": node_to_cluster_size.get(str(node), 0),
+                "component_id": compact.component_label(str(node)),
+            }
+            node_scores.append(NodeScore(
+                id=str(node),
+                risk_score=score,
+                details=details
+            ))
+
+    node_scores.sort(key=lambda x: x.risk_score, reverse=True)
+    return node_scores
+
+
+def _stage_rings(state: AnalysisState):
+    # Overlapping cycles / shells / commission cycles merge into one ring
+    return consolidate_rings(state.outputs["compact"], state.outputs["cycles"], state.outputs["shells"],
+                             state.outputs["commission"], state.outputs["hubs"])
+
+
+def _stage_stats(state: AnalysisState):
+    # Dashboard aggregates over every scored account, not just the top 50 in the result
+    return build_stats(state.batch_id, state.outputs["scoring"], state.outputs["rings"], state.df,
+                       state.outputs["commission"], state.outputs["motifs"], len(state.outputs["compact"].node_ids))
+
+
+# 2. Stage Graph
+# (name, function, upstream stages) in execution order
+STAGES = [
+    ("graph", _stage_graph, []),
+    ("compact", _stage_compact, []),
+    ("hubs", _stage_hubs, ["graph"]),
+    ("cycles", _stage_cycles, ["graph", "hubs"]),
+    ("sketch", _stage_sketch, []),
+    ("fan_out", _stage_fan_out, ["graph", "sketch"]),
+    ("fan_in", _stage_fan_in, ["graph", "sketch"]),
+    ("shells", _stage_shells, ["graph", "hubs"]),
+    ("commission", _stage_commission, ["graph", "cycles"]),
+    ("profiles", _stage_profiles, []),
+    ("motifs", _stage_motifs, ["hubs"]),
+    ("clusters", _stage_clusters, ["graph", "commission"]),
+    ("scoring", _stage_scoring, ["graph", "compact", "cycles", "fan_out", "fan_in", "shells", "commission", "profiles", "clusters"]),
+    ("rings", _stage_rings, ["compact", "cycles", "shells", "commission", "hubs"]),
+    ("stats", _stage_stats, ["compact", "scoring", "rings", "commission", "motifs"]),
+]
+
+# DetectionConfig fields each stage reads directly
+STAGE_RULES = {
+    "hubs": {"hub_degree_percentile", "hub_volume_percentile", "hub_min_degree", "hub_policy", "hub_expansion_cap"},
+    "cycles": {"min_cycle_length", "max_cycle_length", "cycle_horizon_hours", "hub_policy", "hub_expansion_cap"},
+    "sketch": {
+        "sketch_mode", "sketch_epsilon", "sketch_confidence", "sketch_window_slack", "hll_precision", "sketch_sample_size",
+        "fan_in_threshold", "fan_out_threshold", "temporal_window_hours",
+    },
+    "fan_out": {"fan_out_threshold", "degree_outlier_sigma", "temporal_window_hours"},
+    "fan_in": {"fan_in_threshold", "degree_outlier_sigma", "temporal_window_hours"},
+    "shells": {"shell_min_hops", "shell_max_intermediate_tx"},
+    "profiles": {"new_account_days", "dormancy_days", "profile_burst_tx"},
+    "rings": {"ring_merge_jaccard"},
+    "motifs": {"motif_window_hours", "pass_through_minutes", "hub_policy", "hub_expansion_cap"},
+    "scoring": {
+        "weight_cycle", "weight_commission", "weight_smurfing", "weight_profile", "weight_shell",
+        "score_cycle_detected", "score_commission_retention", "score_smurf_detected",
+        "score_shell_detected", "score_profile_risk", "merchant_deduction",
+    },
+}
+
+
+def invalidated_stages(changed_fields: Set[str]) -> Set[str]:
+    """
+    Stages that must rerun when `changed_fields` change: the stages reading
+    those fields directly plus everything downstream of them.
+    """
+    invalid = {stage for stage, fields in STAGE_RULES.items() if fields & changed_fields}
+    for name, _, inputs in STAGES:
+        if any(i in invalid for i in inputs):
+            invalid.add(name)
+    return invalid
+
+
+def run_stages(state: AnalysisState, stages: Optional[Set[str]] = None) -> Set[str]:
+    """
+    Runs `stages` (default: all) in dependency order and records the rules used.
+    """
+    stages = {name for name, _, _ in STAGES} if stages is None else stages
+    # Snapshot first: a rules change landing mid-run must still show up as a diff on rescore
+    snapshot = current_rules.dict()
+    for name, func, _ in STAGES:
+        if name in stages:
+            start = time.perf_counter()
+            state.outputs[name] = func(state)
+            state.timings[name] = round((time.perf_counter() - start) * 1000, 2)
+    state.rules = snapshot
+    return stages
+
+
+# 3. State Cache
+
+_state_cache: "OrderedDict[str, AnalysisState]" = OrderedDict()
+
+
+def _cache_state(state: AnalysisState):
+    _state_cache[state.batch_id] = state
+    _state_cache.move_to_end(state.batch_id)
+    while len(_state_cache) > STATE_CACHE_SIZE:
+        _state_cache.popitem(last=False)
+
+
+def find_batch_file(batch_id: str, suffix: str) -> Optional[Path]:
+    matches = sorted(BUCKET_DIR.glob(f"batch_*_{batch_id}{suffix}"))
+    return matches[0] if matches else None
+
+
+def load_state(batch_id: str) -> Optional[AnalysisState]:
+    """
+    Cached state for a batch, rebuilt from its stored CSV on a cache miss.
+    """
+    if batch_id in _state_cache:
+        _state_cache.move_to_end(batch_id)
+        return _state_cache[batch_id]
+
+    csv_path = find_batch_file(batch_id, ".csv")
+    if csv_path is None:
+        return None
+    df = pd.read_csv(csv_path)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    state = AnalysisState(df.sort_values("timestamp"), batch_id=batch_id)
+    run_stages(state)
+    _cache_state(state)
+    return state
+
+
+# 4. Result Assembly
+
+def _hub_summary(hubs: dict, limit: int = 50) -> dict:
+    """Hubs pruned from the cycle / shell searches, largest first."""
+    ranked = sorted(hubs.items(), key=lambda kv: kv[1]["degree"], reverse=True)[:limit]
+    return {
+        "policy": current_rules.hub_policy,
+        "count": len(hubs),
+        "pruned": [{"id": str(n), **info} for n, info in ranked],
+    }
+
+
+def _motif_summary(motifs: dict, limit: int = 20) -> dict:
+    """Instance count per motif plus the first `limit` instances."""
+    return {name: {"count": m["count"], "instances": m["instances"][:limit]} for name, m in motifs.items()}
+
+
+def build_result(state: AnalysisState, summary_extra: dict = None) -> DetectionResult:
+    clusters = state.outputs["clusters"]
+    summary = {
+        "total_transactions": len(state.df),
+        "mule_count": len(clusters["mule_accounts"]),
+        "suspected_count": len(clusters["suspected_distribution"]),
+        "flagged_amount": sum(m.get("totalAmount", 0) for m in clusters["mule_accounts"]),
+        "stage_timings_ms": dict(state.timings),
+        "hubs": _hub_summary(state.outputs["hubs"]),
+        "motifs": _motif_summary(state.outputs["motifs"]),
+        "rules_version": rules.rules_version,
+    }
+    if summary_extra:
+        summary.update(summary_extra)
+
+    return DetectionResult(
+        batch_id=state.batch_id,
+        processed_at=datetime.utcnow(),
+        total_transactions=len(state.df),
+        suspicious_nodes=state.outputs["scoring"][:50], # Top 50
+        rings=state.outputs["rings"],
+        clusters=clusters,
+        summary=summary
+    )
+
+
+def run_analysis(df: pd.DataFrame, summary_extra: dict = None) -> Tuple[DetectionResult, CompactGraph]:
+    """
+    Runs the full detection pipeline over a validated transaction DataFrame.
+    Returns the result together with the compact graph to persist beside it.
+    """
+    state = AnalysisState(df)
+    run_stages(state)
+    _cache_state(state)
+    return build_result(state, summary_extra), state.outputs["compact"]
+
+
+def rescore(batch_id: str) -> Optional[DetectionResult]:
+    """
+    Re-evaluates a batch under the current rules, rerunning only the stages
+    whose rule fields changed since it was last computed.
+    """
+    # Serialized with rule updates and other rescores: the cached state is shared and updated in place
+    with rules.rules_lock:
+        cached = batch_id in _state_cache
+        state = load_state(batch_id)
+        if state is None:
+            return None
+
+        if cached:
+            current = current_rules.dict()
+            changed = {k for k, v in current.items() if state.rules.get(k) != v}
+            state.timings = {}
+            rerun = run_stages(state, invalidated_stages(changed))
+        else:
+            # Cache miss: load_state already ran every stage under the current rules
+            rerun = set(state.timings)
+        return build_result(state, {"recomputed_stages": sorted(rerun)})
+
+
+def save_artifacts(result: DetectionResult, accounts):
+    """
+    Persists what the read endpoints serve beside the batch JSON: the
+    account -> ring membership, the dashboard stats and the batch's postings
+    in the cross-batch account index (full scoring when the state is cached).
+    """
+    rings = [r.dict() for r in result.rings]
+    RingMembership.from_rings(rings).save(result.batch_id)
+    state = _state_cache.get(result.batch_id)
+    if state is not None:
+        save_stats(state.outputs["stats"])
+    node_scores = state.outputs["scoring"] if state is not None else result.suspicious_nodes
+    account_index.add_batch(result.batch_id, build_postings(
+        result.batch_id,
+        result.processed_at.isoformat(),
+        accounts,
+        [n.dict() for n in node_scores],
+        rings,
+    ))
+
+
+def save_batch(result: DetectionResult, compact: CompactGraph) -> Path:
+    """
+    Writes the result JSON to the bucket; the compact graph, suspect
+    component layouts, ring membership, stats and account postings go to its artifacts.
+    Returns the batch path without extension so callers can store the CSV beside it.
+    """
+    BUCKET_DIR.mkdir(exist_ok=True)
+    timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+    batch_path = BUCKET_DIR / f"batch_{timestamp_str}_{result.batch_id}"
+
+    # Render once: the same bytes go to disk and into the response cache
+    body = result.json().encode()
+    json_path = batch_path.with_suffix(".json")
+    json_path.write_bytes(body)
+    prime(json_path, body)
+    compact.save(result.batch_id)
+
+    # Lay out the components investigators will open first
+    suspect_components = [n.details["component_id"] for n in result.suspicious_nodes if n.details.get("component_id") is not None]
+    precompute_layouts(compact, result.batch_id, suspect_components)
+    save_artifacts(result, compact.node_ids.tolist())
+
+    return batch_path
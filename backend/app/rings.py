@@ -0,0 +1,194 @@
+"""
+Ring consolidation: cycles, shell chains and commission cycles that share a
+transfer edge or most of their members are merged into one ring with
+union-find, and every ring's volume and member stats come from one
+vectorized pass over the compact graph's transaction arrays. Each batch persists a sorted account -> ring membership
+array beside its compact graph.
+"""
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.compact_graph import CompactGraph, union_find_labels
+from app.rules import current_rules
+from app.storage import artifact_dir
+
+MEMBERSHIP_FILE = "rings.npz"
+
+
+def ring_id(members) -> str:
+    """Content-based id: the same accounts always form the same ring id."""
+    digest = hashlib.sha1("\x1f".join(sorted(members)).encode()).hexdigest()
+    return f"R-{digest[:10].upper()}"
+
+
+def _pattern_type(cycles: int, shells: int, single_cycle: bool) -> str:
+    if cycles and not shells and single_cycle:
+        return "Circular"
+    if cycles:
+        return "Chain"
+    return "Layered Shell"
+
+
+def _pattern_risk(length: int) -> int:
+    """Base 50 + 10 per entry of the detected path (a cycle lists its start node twice)."""
+    return min(100, 50 + length * 10)
+
+
+def consolidate_rings(compact: CompactGraph, cycles: List[List[str]], shells: List[List[str]],
+                      commission_nodes: List[str], hubs: Optional[dict] = None) -> List[Dict]:
+    """
+    Merges substantially overlapping patterns into rings, highest risk first.
+    Two patterns merge when they share a transfer edge between non-hub accounts,
+    or when their non-hub members overlap by at least ring_merge_jaccard; a
+    single shared account is not enough. A ring scores as its riskiest pattern.
+    """
+    groups = [("cycle", g) for g in cycles] + [("shell", g) for g in shells]
+    groups = [(kind, [str(n) for n in g]) for kind, g in groups if g]
+    if not groups:
+        return []
+
+    # 1. Flatten patterns to (group, node index) arrays, path order kept
+    index = compact.index
+    n = len(compact.node_ids)
+    lengths = np.array([len(g) for _, g in groups], dtype=np.int64)
+    node = np.array([index[m] for _, g in groups for m in g], dtype=np.int64)
+    group = np.repeat(np.arange(len(groups)), lengths)
+    is_cycle = np.array([kind == "cycle" for kind, _ in groups])
+
+    hub_mask = np.zeros(n, dtype=bool)
+    hub_mask[[index[h] for h in (hubs or {}) if h in index]] = True
+
+    # Distinct (group, node) memberships
+    _, first = np.unique(group * n + node, return_index=True)
+    first.sort()
+    m_group, m_node = group[first], node[first]
+    group_size = np.bincount(m_group, minlength=len(groups))
+
+    # 2. Links: shared non-hub edges (consecutive path entries) ...
+    step = np.flatnonzero(group[1:] == group[:-1])
+    u, v = node[step], node[step + 1]
+    edge_ok = ~hub_mask[u] & ~hub_mask[v]
+    edge_key, edge_group = (u * n + v)[edge_ok], group[step][edge_ok]
+    order = np.lexsort((edge_group, edge_key))
+    edge_key, edge_group = edge_key[order], edge_group[order]
+    same_edge = np.flatnonzero(edge_key[1:] == edge_key[:-1])
+    link_src, link_dst = [edge_group[same_edge]], [edge_group[same_edge + 1]]
+
+    # ... or member overlap (Jaccard over non-hub members) above the rule threshold
+    members = pd.DataFrame({"group": m_group, "node": m_node})[~hub_mask[m_node]]
+    pairs = members.merge(members, on="node")
+    pairs = pairs[pairs["group_x"] < pairs["group_y"]]
+    if len(pairs):
+        shared = pairs.groupby(["group_x", "group_y"]).size().reset_index(name="shared")
+        gx, gy = shared["group_x"].to_numpy(), shared["group_y"].to_numpy()
+        non_hub = np.bincount(members["group"].to_numpy(), minlength=len(groups))
+        jaccard = shared["shared"].to_numpy() / (non_hub[gx] + non_hub[gy] - shared["shared"].to_numpy())
+        close = jaccard >= current_rules.ring_merge_jaccard
+        link_src.append(gx[close])
+        link_dst.append(gy[close])
+
+    labels = union_find_labels(len(groups), np.concatenate(link_src), np.concatenate(link_dst))
+    _, ring_of_group = np.unique(labels, return_inverse=True)
+    n_rings = int(ring_of_group.max()) + 1
+
+    # 3. Distinct (ring, node) memberships, in order of first appearance
+    ring_of_member = ring_of_group[m_group]
+    keys = ring_of_member * n + m_node
+    _, first = np.unique(keys, return_index=True)
+    first.sort()
+    member_ring, member_node = ring_of_member[first], m_node[first]
+    member_keys = np.sort(keys[first])
+
+    # 4. Transactions inside a ring: both ends are members of the same ring.
+    # An account can sit in several rings, so join transactions to the rings of their sender.
+    by_node = np.argsort(member_node, kind="stable")
+    sorted_nodes = member_node[by_node]
+    lo = np.searchsorted(sorted_nodes, compact.src, side="left")
+    count = np.searchsorted(sorted_nodes, compact.src, side="right") - lo
+    tx = np.repeat(np.arange(len(compact.src)), count)
+    offset = np.arange(len(tx)) - np.repeat(np.cumsum(count) - count, count)
+    ring = member_ring[by_node[np.repeat(lo, count) + offset]]
+    inside = np.isin(ring * n + compact.dst[tx], member_keys)
+    amounts = compact.amounts if compact.amounts is not None else np.zeros(len(compact.src))
+    volume = np.bincount(ring[inside], weights=amounts[tx[inside]], minlength=n_rings)
+    tx_count = np.bincount(ring[inside], minlength=n_rings)
+
+    # 5. Member and pattern stats per ring
+    member_count = np.bincount(member_ring, minlength=n_rings)
+    cycle_count = np.bincount(ring_of_group[is_cycle], minlength=n_rings)
+    shell_count = np.bincount(ring_of_group[~is_cycle], minlength=n_rings)
+    largest_cycle = np.zeros(n_rings, dtype=np.int64)
+    np.maximum.at(largest_cycle, ring_of_group[is_cycle], group_size[is_cycle])
+    risk = np.zeros(n_rings, dtype=np.int64)
+    np.maximum.at(risk, ring_of_group, [_pattern_risk(int(k)) for k in lengths])
+    commission_mask = np.zeros(n, dtype=bool)
+    commission_mask[[index[c] for c in map(str, commission_nodes) if c in index]] = True
+    commission_count = np.bincount(member_ring[commission_mask[member_node]], minlength=n_rings)
+
+    order = np.argsort(member_ring, kind="stable")
+    bounds = np.r_[0, np.cumsum(member_count)]
+    node_ids = compact.node_ids[member_node[order]].tolist()
+
+    rings = []
+    for r in range(n_rings):
+        ring_members = node_ids[bounds[r]:bounds[r + 1]]
+        size = int(member_count[r])
+        rings.append({
+            "ring_id": ring_id(ring_members),
+            "nodes": ring_members,
+            "risk_score": int(risk[r]),
+            "pattern_type": _pattern_type(int(cycle_count[r]), int(shell_count[r]), largest_cycle[r] == size),
+            "total_volume": float(volume[r]),
+            "member_count": size,
+            "tx_count": int(tx_count[r]),
+            "patterns": {
+                "cycles": int(cycle_count[r]),
+                "shells": int(shell_count[r]),
+                "commission_members": int(commission_count[r]),
+            },
+        })
+    return sorted(rings, key=lambda x: (-x["risk_score"], -x["total_volume"], x["ring_id"]))
+
+
+class RingMembership:
+    """Sorted account ids with the (highest-risk) ring each belongs to."""
+
+    def __init__(self, ids: np.ndarray, ring_index: np.ndarray, ring_ids: np.ndarray):
+        self.ids = ids
+        self.ring_index = ring_index
+        self.ring_ids = ring_ids
+
+    @classmethod
+    def from_rings(cls, rings: List[dict]) -> "RingMembership":
+        """`rings` highest risk first, so an account's first ring wins."""
+        ids = np.array([str(m) for r in rings for m in r["nodes"]], dtype=str)
+        owner = np.repeat(np.arange(len(rings)), [len(r["nodes"]) for r in rings])
+        ids, first = np.unique(ids, return_index=True)
+        return cls(ids, owner[first], np.array([r["ring_id"] for r in rings], dtype=str))
+
+    def lookup(self, accounts, default: Optional[str] = None) -> List[Optional[str]]:
+        """Ring id per account, `default` for accounts in no ring."""
+        accounts = np.asarray(accounts, dtype=str)
+        if not len(self.ids):
+            return [default] * len(accounts)
+        pos = np.minimum(np.searchsorted(self.ids, accounts), len(self.ids) - 1)
+        found = self.ids[pos] == accounts
+        return [self.ring_ids[self.ring_index[p]] if f else default for p, f in zip(pos.tolist(), found.tolist())]
+
+    def save(self, batch_id: str) -> Path:
+        path = artifact_dir(batch_id) / MEMBERSHIP_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(path, ids=self.ids, ring_index=self.ring_index, ring_ids=self.ring_ids)
+        return path
+
+    @classmethod
+    def load(cls, batch_id: str) -> Optional["RingMembership"]:
+        path = artifact_dir(batch_id) / MEMBERSHIP_FILE
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            return cls(data["ids"], data["ring_index"], data["ring_ids"])
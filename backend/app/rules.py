@@ -1,6 +1,11 @@
 
+import threading
+from datetime import datetime
+
 from pydantic import BaseModel
 
+HUB_POLICIES = ("exclude", "endpoint", "cap")
+
 class DetectionConfig(BaseModel):
     # SMURFING Rules
     fan_out_threshold: int = 10  # Fallback absolute minimum
@@ -13,6 +18,7 @@ class DetectionConfig(BaseModel):
 
     # TEMPORAL Rules
     temporal_window_hours: int = 72
+    cycle_horizon_hours: int = 168  # A cycle must close within this long of its first hop
 
     # LAYERED SHELL Rules
     shell_min_hops: int = 3
@@ -23,9 +29,36 @@ class DetectionConfig(BaseModel):
     shell_min_hops: int = 3
     shell_max_intermediate_tx: int = 3 # "2-3 total" from specs
 
+    # HUB Rules: very high-degree accounts (merchants, exchanges, payout
+    # platforms) are pruned from cycle / shell searches
+    hub_degree_percentile: float = 99.0   # Counterparty count above this percentile...
+    hub_volume_percentile: float = 99.0   # ...or transaction count above this one
+    hub_min_degree: int = 50              # Absolute floor for both, so small batches have no hubs
+    hub_policy: str = "endpoint"          # "exclude" | "endpoint" (entered, never expanded) | "cap"
+    hub_expansion_cap: int = 25           # Successors a search may expand from a hub under "cap"
+
+    # SKETCH Rules: approximate candidate search for stream-scale batches;
+    # exact fan-in / fan-out confirmation runs only on the accounts flagged
+    sketch_mode: bool = False
+    sketch_epsilon: float = 0.00001       # Count-min overestimates a window count by at most this fraction of the stream...
+    sketch_confidence: float = 0.99       # ...with this probability
+    sketch_window_slack: float = 0.25     # Windowed counts cover W x (1 + slack): smaller is tighter but costs more grids
+    hll_precision: int = 14               # 2^p registers; unique-account error ~ 1.04 / sqrt(2^p)
+    sketch_sample_size: int = 131072      # Distinct edges sampled for the degree mean / std
+    bloom_capacity: int = 1000000         # transaction_ids the store's duplicate filter is sized for
+    bloom_error_rate: float = 0.001       # False-positive rate of that filter at capacity
+
+    # RING Rules: patterns merge into one ring when they share a transfer edge...
+    ring_merge_jaccard: float = 0.5       # ...or at least this fraction of their non-hub members
+
+    # MOTIF Rules: temporal motifs found in one chronological pass
+    motif_window_hours: int = 24          # Scatter-gather / fan-then-cycle must complete within this
+    pass_through_minutes: int = 60        # In-then-out counts as a pass-through within this
+
     # PROFILE Rules (New)
     new_account_days: int = 30
     dormancy_days: int = 90
+    profile_burst_tx: int = 3  # Incoming transactions in one batch that count as a burst
 
     # SCORING Weights (Target 100 total)
     weight_cycle: float = 0.50       # Reduced to fit shell
@@ -46,3 +79,52 @@ class DetectionConfig(BaseModel):
 
 # Singleton instance
 current_rules = DetectionConfig()
+
+# Runtime updates: every accepted change bumps the version and is recorded
+rules_version = 1
+rules_history = []
+# Held while rules change and while a cached batch is re-scored, so a rescore
+# never sees the rules move underneath it
+rules_lock = threading.Lock()
+
+def update_rules(changes: dict) -> set:
+    """
+    Validates `changes` against DetectionConfig and applies them to the
+    singleton in place (modules hold a reference to it, so it is never rebound).
+    Returns the names of the fields whose value actually changed.
+    """
+    global rules_version
+
+    unknown = set(changes) - set(current_rules.dict())
+    if unknown:
+        raise ValueError(f"Unknown rule fields: {sorted(unknown)}")
+
+    candidate = DetectionConfig(**{**current_rules.dict(), **changes})
+    if candidate.min_cycle_length > candidate.max_cycle_length:
+        raise ValueError("min_cycle_length must not exceed max_cycle_length")
+    if candidate.hub_policy not in HUB_POLICIES:
+        raise ValueError(f"hub_policy must be one of {list(HUB_POLICIES)}")
+    if not (0 < candidate.sketch_epsilon < 1 and 0 < candidate.sketch_confidence < 1 and 0 < candidate.bloom_error_rate < 1 and 0 < candidate.sketch_window_slack <= 1):
+        raise ValueError("sketch_epsilon, sketch_confidence and bloom_error_rate must be in (0, 1), sketch_window_slack in (0, 1]")
+    if not 4 <= candidate.hll_precision <= 16:
+        raise ValueError("hll_precision must be between 4 and 16")
+    if not 0 < candidate.ring_merge_jaccard <= 1:
+        raise ValueError("ring_merge_jaccard must be in (0, 1]")
+    if candidate.sketch_sample_size < 1:
+        raise ValueError("sketch_sample_size must be positive")
+    negative = [k for k, v in candidate.dict().items() if isinstance(v, (int, float)) and v < 0]
+    if negative:
+        raise ValueError(f"Rule values must be non-negative: {negative}")
+
+    with rules_lock:
+        changed = {k for k in changes if getattr(current_rules, k) != getattr(candidate, k)}
+        if changed:
+            for field in changed:
+                setattr(current_rules, field, getattr(candidate, field))
+            rules_version += 1
+            rules_history.append({
+                "version": rules_version,
+                "updated_at": datetime.utcnow().isoformat(),
+                "changed": {k: getattr(candidate, k) for k in sorted(changed)},
+            })
+    return changed
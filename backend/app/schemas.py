@@ -25,6 +25,9 @@ class Ring(BaseModel):
     risk_score: float
     pattern_type: str
     total_volume: Optional[float] = 0.0
+    member_count: int = 0
+    tx_count: int = 0  # Transactions between members
+    patterns: dict = {}  # cycles / shells / commission_members merged into the ring
 
 class DetectionResult(BaseModel):
     batch_id: str
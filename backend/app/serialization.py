@@ -0,0 +1,131 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+# Optional accelerators: plain json / gzip are used when these are not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 6
+RENDER_CACHE_SIZE = 16  # Rendered payloads kept in memory (batch JSON, export, stats... per variant)
+MSGPACK_TYPE = "application/msgpack"
+
+
+def dumps(obj) -> bytes:
+    """Compact JSON bytes (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, separators=(",", ":"), default=str).encode()
+
+
+def loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class RenderedPayload:
+    """
+    One response body rendered once, with its compressed variants and ETag.
+    """
+
+    def __init__(self, body: bytes, media_type: str = "application/json"):
+        self.body = body
+        self.media_type = media_type
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self.encoded = {"gzip": gzip.compress(body, compresslevel=GZIP_LEVEL)}
+        if brotli is not None:
+            self.encoded["br"] = brotli.compress(body)
+
+
+# (source path, variant) -> (source mtime, payload), least recently served first
+_cache: "OrderedDict[Tuple[str, str], Tuple[float, RenderedPayload]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _store(key: Tuple[str, str], mtime: float, payload: RenderedPayload):
+    with _lock:
+        _cache[key] = (mtime, payload)
+        _cache.move_to_end(key)
+        while len(_cache) > RENDER_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def render_file(path: Path, variant: str, build: Callable[[bytes], object] = None) -> RenderedPayload:
+    """
+    Rendered payload derived from a bucket file, rebuilt only when the file changes.
+    Without `build` the file bytes are served verbatim; otherwise `build(raw)`
+    returns the object to encode. `variant` names the derivation; a `msgpack`
+    suffix selects msgpack encoding.
+    """
+    key = (str(path), variant)
+    mtime = os.path.getmtime(path)
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None and hit[0] == mtime:
+            _cache.move_to_end(key)
+            return hit[1]
+
+    raw = Path(path).read_bytes()
+    if variant.endswith("msgpack"):
+        obj = build(raw) if build else loads(raw)
+        payload = RenderedPayload(msgpack.packb(obj, default=str), MSGPACK_TYPE)
+    elif build is None:
+        payload = RenderedPayload(raw)
+    else:
+        payload = RenderedPayload(dumps(build(raw)))
+
+    _store(key, mtime, payload)
+    return payload
+
+
+def prime(path: Path, body: bytes):
+    """Seed the cache with bytes just written to `path`, so the first poll skips the read."""
+    _store((str(path), "raw"), os.path.getmtime(path), RenderedPayload(body))
+
+
+def wants_msgpack(request: Request) -> bool:
+    return msgpack is not None and MSGPACK_TYPE in request.headers.get("accept", "")
+
+
+def respond(request: Request, payload: RenderedPayload, headers: dict = None) -> Response:
+    """
+    Serve pre-rendered bytes: 304 when the client's ETag matches, otherwise the
+    best pre-compressed variant it accepts.
+    """
+    out = {"ETag": payload.etag, "Vary": "Accept-Encoding, Accept", "Cache-Control": "no-cache"}
+    if headers:
+        out.update(headers)
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if payload.etag in {tag.strip() for tag in if_none_match.split(",")} or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=out)
+
+    accepted = request.headers.get("accept-encoding", "")
+    body = payload.body
+    for encoding in ("br", "gzip"):
+        if encoding in payload.encoded and encoding in accepted:
+            body = payload.encoded[encoding]
+            out["Content-Encoding"] = encoding
+            break
+    return Response(content=body, media_type=payload.media_type, headers=out)
@@ -0,0 +1,278 @@
+"""
+Probabilistic sketches for stream-scale batches: HyperLogLog and a distinct
+sample (unique accounts and counterparties), count-min (windowed transaction
+counts) and a Bloom filter (transaction_id de-duplication). All updates and
+queries are vectorized; memory is fixed by the error bounds, not the stream.
+"""
+import math
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.rules import current_rules
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+SKETCH_CHUNK_ROWS = 100000  # Transactions per ActivitySketch.update in sketch_candidates
+
+
+def hash_values(values) -> np.ndarray:
+    """Stable 64-bit hash per value (same input, same hash, across processes)."""
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+def _mix(h: np.ndarray, seed: int) -> np.ndarray:
+    """splitmix64 finalizer: derives independent hashes from one base hash."""
+    with np.errstate(over="ignore"):
+        z = h + np.uint64(seed) * _GOLDEN
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _keyed(account_hashes: np.ndarray, buckets: np.ndarray) -> np.ndarray:
+    """One hash per (account, time bucket) pair."""
+    return _mix(account_hashes ^ _mix(buckets.astype(np.uint64), 1), 2)
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    """Vectorized int.bit_length() for uint64 arrays."""
+    length = np.zeros(len(x), dtype=np.int64)
+    x = x.copy()
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = (x >> np.uint64(shift)) > 0
+        length[high] += shift
+        x[high] >>= np.uint64(shift)
+    return length + (x > 0)
+
+
+class HyperLogLog:
+    """
+    Distinct count in 2^precision one-byte registers, whatever the stream length.
+    Relative error is about 1.04 / sqrt(2 ** precision).
+    """
+
+    def __init__(self, precision: int):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add(self, item_hashes: np.ndarray):
+        register = (item_hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        rest = item_hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        rho = (64 - self.precision) - _bit_length(rest) + 1
+        np.maximum.at(self.registers, register, rho.astype(np.uint8))
+
+    def estimate(self) -> float:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m ** 2 / np.power(2.0, -self.registers.astype(np.float64)).sum()
+        zeros = int((self.registers == 0).sum())
+        # Small-range correction (linear counting) keeps low counts near exact
+        if raw <= 2.5 * self.m and zeros:
+            raw = self.m * math.log(self.m / zeros)
+        return float(raw)
+
+
+class DistinctSample:
+    """
+    Uniform sample of distinct items holding at most `capacity` of them. An item
+    is kept while its hash is under a threshold that halves whenever the sample
+    overflows, so repeats of an item never skew it: every distinct item seen is
+    in the sample with probability `rate`. Each item carries extra hash columns
+    (e.g. an edge carries its sender and receiver).
+    """
+
+    def __init__(self, capacity: int, columns: int):
+        self.capacity = capacity
+        self.level = 0
+        self.items = np.zeros(0, dtype=np.uint64)
+        self.columns = [np.zeros(0, dtype=np.uint64) for _ in range(columns)]
+
+    @property
+    def rate(self) -> float:
+        return 0.5 ** self.level
+
+    def _kept(self, item_hashes: np.ndarray) -> np.ndarray:
+        if self.level == 0:
+            return np.ones(len(item_hashes), dtype=bool)
+        return (item_hashes >> np.uint64(64 - self.level)) == 0
+
+    def add(self, item_hashes: np.ndarray, *columns: np.ndarray):
+        kept = self._kept(item_hashes)
+        items = np.concatenate([self.items, item_hashes[kept]])
+        self.items, first = np.unique(items, return_index=True)
+        self.columns = [np.concatenate([old, new[kept]])[first] for old, new in zip(self.columns, columns)]
+        while len(self.items) > self.capacity:
+            self.level += 1
+            kept = self._kept(self.items)
+            self.items = self.items[kept]
+            self.columns = [col[kept] for col in self.columns]
+
+    def group_moments(self, column: int) -> Tuple[float, float]:
+        """
+        Unbiased estimates of sum(d) and sum(d^2), where d is the number of
+        distinct items per value of `column` (e.g. out-degree per sender).
+        """
+        if not len(self.items):
+            return 0.0, 0.0
+        sampled = np.unique(self.columns[column], return_counts=True)[1].astype(np.float64)
+        p = self.rate
+        # E[s] = d p and E[s^2] = d^2 p^2 + d p (1 - p) for s ~ Binomial(d, p)
+        return float(sampled.sum() / p), float(((sampled ** 2).sum() - (1 - p) * sampled.sum()) / p ** 2)
+
+
+class CountMinSketch:
+    """
+    Overestimates any count by at most `epsilon` x (total insertions) with
+    probability `confidence`; never underestimates. The table is
+    depth x e / epsilon counters, independent of the stream length.
+    """
+
+    def __init__(self, epsilon: float, confidence: float):
+        self.width = max(16, math.ceil(math.e / epsilon))
+        self.depth = math.ceil(math.log(1 / (1 - confidence)))
+        self.table = np.zeros((self.depth, self.width), dtype=np.int32)
+        self.total = 0
+
+    def _columns(self, key_hashes: np.ndarray):
+        return [(_mix(key_hashes, 10 + i) % np.uint64(self.width)).astype(np.int64) for i in range(self.depth)]
+
+    def add(self, key_hashes: np.ndarray):
+        """
+        Conservative update, one call at a time: each key's counters are raised
+        only to (its current estimate + its count in this call), never past it.
+        Estimates stay upper bounds but collide far less than plain increments.
+        """
+        keys, counts = np.unique(key_hashes, return_counts=True)
+        columns = self._columns(keys)
+        target = (np.min([self.table[i][col] for i, col in enumerate(columns)], axis=0) + counts).astype(np.int32)
+        for i, col in enumerate(columns):
+            np.maximum.at(self.table[i], col, target)
+        self.total += len(key_hashes)
+
+    def query(self, key_hashes: np.ndarray) -> np.ndarray:
+        return np.min([self.table[i][col] for i, col in enumerate(self._columns(key_hashes))], axis=0)
+
+
+class BloomFilter:
+    """Set membership with no false negatives and a configurable false-positive rate."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = np.zeros(self.size, dtype=bool)
+        self.count = 0
+
+    def _positions(self, values) -> np.ndarray:
+        # Double hashing: g_i = h1 + i * h2
+        base = hash_values(values)
+        h1, h2 = _mix(base, 20), _mix(base, 21) | np.uint64(1)
+        with np.errstate(over="ignore"):
+            return np.stack([(h1 + np.uint64(i) * h2) % np.uint64(self.size) for i in range(self.hashes)]).astype(np.int64)
+
+    def add(self, values):
+        if len(values):
+            self.bits[self._positions(values).ravel()] = True
+            self.count += len(values)
+
+    def might_contain(self, values) -> np.ndarray:
+        if not len(values):
+            return np.zeros(0, dtype=bool)
+        return self.bits[self._positions(values)].all(axis=0)
+
+    @property
+    def saturated(self) -> bool:
+        """Past capacity the false-positive rate climbs above `error_rate`."""
+        return self.count > self.capacity
+
+    def save(self, path: Path):
+        np.savez_compressed(path, bits=np.packbits(self.bits),
+                            meta=np.array([self.capacity, self.size, self.hashes, self.count]),
+                            error_rate=np.array([self.error_rate]))
+
+    @classmethod
+    def load(cls, path: Path) -> "BloomFilter":
+        with np.load(path) as data:
+            capacity, size, hashes, count = data["meta"].tolist()
+            bloom = cls.__new__(cls)
+            bloom.capacity, bloom.size, bloom.hashes, bloom.count = capacity, size, hashes, count
+            bloom.error_rate = float(data["error_rate"][0])
+            bloom.bits = np.unpackbits(data["bits"], count=size).astype(bool)
+        return bloom
+
+
+class ActivitySketch:
+    """
+    Per-direction activity summary of a transaction stream in fixed memory:
+    count-min counters per (account, time cell), a HyperLogLog of accounts and
+    a distinct sample of edges for the degree distribution. Fed chunk by chunk,
+    so a batch never has to be held as a graph to find candidates.
+
+    Time cells come from several grids of width W(1 + slack), each shifted by
+    W x slack, so every W-long window fits inside exactly one cell: one
+    count-min query per cell bounds the window count from above.
+    """
+
+    def __init__(self, window_hours: int, floors: Dict[str, int]):
+        slack = current_rules.sketch_window_slack
+        self.grids = math.ceil(1 / slack) + 1
+        self.shift = window_hours * 3600 * slack
+        self.width = window_hours * 3600 + self.shift
+        self.floors = floors
+        self.counts = {d: CountMinSketch(current_rules.sketch_epsilon, current_rules.sketch_confidence) for d in ("in", "out")}
+        self.accounts = HyperLogLog(current_rules.hll_precision)
+        self.edges = DistinctSample(current_rules.sketch_sample_size, columns=2)  # Columns: sender, receiver
+        # Accounts whose window bound reached the floor: the only per-account state kept
+        self.candidates = {d: set() for d in ("in", "out")}
+
+    def update(self, df: pd.DataFrame):
+        df = df[df["sender_id"] != df["receiver_id"]]
+        if df.empty:
+            return
+        seconds = df["timestamp"].to_numpy().astype("datetime64[s]").astype(np.int64)
+        # Cell id encodes (grid, position in grid)
+        cells = np.concatenate([
+            ((seconds - j * self.shift) // self.width).astype(np.int64) * self.grids + j
+            for j in range(self.grids)
+        ])
+        senders, receivers = df["sender_id"].to_numpy(), df["receiver_id"].to_numpy()
+        sender_hashes, receiver_hashes = hash_values(senders), hash_values(receivers)
+        self.accounts.add(np.concatenate([sender_hashes, receiver_hashes]))
+        self.edges.add(_mix(sender_hashes ^ _mix(receiver_hashes, 3), 4), sender_hashes, receiver_hashes)
+
+        for direction, accounts, account_hashes in (("in", receivers, receiver_hashes), ("out", senders, sender_hashes)):
+            keys = _keyed(np.tile(account_hashes, self.grids), cells)
+            self.counts[direction].add(keys)
+            # Counters only grow, so a window reaching the floor is caught when its last transaction streams in
+            hit = np.flatnonzero(self.counts[direction].query(keys) >= self.floors[direction])
+            if len(hit):
+                self.candidates[direction].update(accounts[hit % len(accounts)].tolist())
+
+    def degree_stats(self, direction: str) -> Tuple[float, float]:
+        """Estimated (mean, std) of the in- or out-degree over every account seen."""
+        n = self.accounts.estimate()
+        if n < 1:
+            return 0.0, 0.0
+        total, squares = self.edges.group_moments(1 if direction == "in" else 0)
+        mean = total / n
+        return mean, math.sqrt(max(0.0, squares / n - mean ** 2))
+
+
+def sketch_candidates(df: pd.DataFrame) -> dict:
+    """
+    Accounts whose sketched window count could reach the fan-in / fan-out floor,
+    plus estimated degree (mean, std) for the dynamic thresholds. The frame is
+    streamed SKETCH_CHUNK_ROWS at a time; only the candidates need exact confirmation.
+    """
+    sketch = ActivitySketch(current_rules.temporal_window_hours,
+                            {"in": current_rules.fan_in_threshold, "out": current_rules.fan_out_threshold})
+    for start in range(0, len(df), SKETCH_CHUNK_ROWS):
+        sketch.update(df.iloc[start:start + SKETCH_CHUNK_ROWS])
+
+    return {
+        direction: {"candidates": sketch.candidates[direction], "degree_stats": sketch.degree_stats(direction)}
+        for direction in ("in", "out")
+    }
@@ -0,0 +1,172 @@
+"""
+Cold-start support: lazy heavy imports, per-module import timings and a
+background warm-up that preloads the latest batch before the first request.
+"""
+import importlib
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+from app.storage import BUCKET_DIR, latest_file, batch_id_from_path
+
+MODEL_DIR = Path(os.environ.get("RIFT_MODEL_DIR", Path(__file__).parent.parent.parent / "model"))
+WARMUP_ENABLED = os.environ.get("RIFT_WARMUP", "1") != "0"
+
+# Imported by the warm-up in this order; everything the pipeline touches
+WARM_MODULES = [
+    "numpy", "pandas", "networkx",
+    "app.validation", "app.graph_builder", "app.compact_graph", "app.layouts",
+    "app.pipeline", "app.transaction_store", "app.sweep", "app.account_index",
+]
+
+BOOT_STARTED = time.perf_counter()
+
+# module name -> milliseconds spent importing it (first import only)
+import_timings: Dict[str, float] = {}
+
+
+def timed_import(name: str):
+    """Imports `name`, recording how long the first import took."""
+    first = name not in sys.modules
+    start = time.perf_counter()
+    # import_module (not a sys.modules lookup) waits for a half-finished import on another thread
+    module = importlib.import_module(name)
+    if first:
+        import_timings[name] = round((time.perf_counter() - start) * 1000, 2)
+    return module
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access,
+    so the health path never pays for pandas / networkx.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = timed_import(self._name)
+        return getattr(self._module, attr)
+
+
+def lazy_module(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+class Readiness:
+    """
+    Warm state of the process. Liveness is simply "the app answers";
+    readiness means the warm-up has finished.
+    """
+
+    def __init__(self):
+        self.warmed = threading.Event()
+        self.boot_ms = None
+        self.warmup_ms = None
+        self.preloaded = {}
+        self.model_status = {}
+        self.errors = []
+
+    @property
+    def ready(self) -> bool:
+        return self.warmed.is_set()
+
+    def report(self) -> dict:
+        return {
+            "ready": self.ready,
+            "boot_ms": self.boot_ms,
+            "warmup_ms": self.warmup_ms,
+            "import_ms": dict(import_timings),
+            "preloaded": dict(self.preloaded),
+            "models": dict(self.model_status),
+            "errors": list(self.errors),
+        }
+
+
+readiness = Readiness()
+
+
+def inventory_models(model_dir: Path = MODEL_DIR) -> Dict[str, str]:
+    """
+    Lists the `*.pkl` artifacts without unpickling them: the scoring pipeline
+    is rule-based and nothing consumes them yet, so loading them only cost
+    warm-up time. Recorded as "available" (never "loaded") and reported by
+    /health/ready for information only: readiness does not depend on them.
+    """
+    status = {}
+    for path in sorted(model_dir.glob("*.pkl")):
+        status[path.name] = "available" if os.access(path, os.R_OK) else "failed: unreadable"
+    return status
+
+
+def storage_probe() -> dict:
+    """Checks the bucket is reachable and writable, timing the round trip."""
+    start = time.perf_counter()
+    connected = BUCKET_DIR.is_dir() and os.access(BUCKET_DIR, os.W_OK)
+    return {"database_connected": connected, "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+
+def warm_up():
+    """
+    Imports the pipeline, then preloads the latest batch (rendered JSON and
+    compact graph) and lists the model artifacts. Failures are recorded, never raised.
+    """
+    start = time.perf_counter()
+
+    # 1. Heavy imports
+    for name in WARM_MODULES:
+        try:
+            timed_import(name)
+        except Exception as e:
+            readiness.errors.append(f"import {name}: {e}")
+
+    # 2. Latest batch: response bytes and compact graph
+    try:
+        from app.serialization import render_file
+        from app.compact_graph import CompactGraph
+
+        latest_json = latest_file("batch_*.json")
+        if latest_json is not None:
+            render_file(latest_json, "raw")
+            readiness.preloaded["batch"] = batch_id_from_path(latest_json)
+
+        latest_csv = latest_file("batch_*.csv")
+        if latest_csv is not None:
+            compact = CompactGraph.load(batch_id_from_path(latest_csv))
+            if compact is not None:
+                # Building the id index now saves it on the first lookup
+                readiness.preloaded["compact_nodes"] = len(compact.index)
+    except Exception as e:
+        readiness.errors.append(f"preload batch: {e}")
+
+    # 3. Cross-batch account index (indexes older batches on first boot)
+    try:
+        from app.account_index import account_index
+        account_index.load()
+        readiness.preloaded["indexed_accounts"] = len(account_index.postings)
+    except Exception as e:
+        readiness.errors.append(f"account index: {e}")
+
+    # 4. Model artifacts (listed, not loaded)
+    readiness.model_status.update(inventory_models())
+
+    readiness.warmup_ms = round((time.perf_counter() - start) * 1000, 2)
+    readiness.warmed.set()
+    print(f"Warm-up finished in {readiness.warmup_ms}ms")
+
+
+def start_warm_up():
+    """Runs the warm-up on a daemon thread so the server accepts requests immediately."""
+    readiness.boot_ms = round((time.perf_counter() - BOOT_STARTED) * 1000, 2)
+    if not WARMUP_ENABLED:
+        readiness.warmed.set()
+        return None
+    thread = threading.Thread(target=warm_up, name="rift-warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,101 @@
+"""
+Dashboard aggregates over every scored account of a batch (the batch JSON
+only carries the top 50): score histogram, pattern / role counts, ring size
+distribution and volume by hour. Persisted as a small JSON beside the
+batch's other artifacts so /stats is served as-is.
+"""
+import json
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from app import rules
+from app.storage import artifact_dir
+
+STATS_FILE = "stats.json"
+SCORE_BINS = 10  # Histogram bins over [0, 100]
+
+
+def _counts(values) -> dict:
+    return {str(k): int(v) for k, v in pd.Series(values, dtype=object).dropna().value_counts().items()}
+
+
+def build_stats(batch_id: str, node_scores: List, rings: List[dict], df: pd.DataFrame,
+                commission_nodes: List[str], motifs: dict, accounts: int) -> dict:
+    """
+    `node_scores` is the full scoring output (NodeScore objects or dicts; it
+    omits zero-score accounts), `rings` the consolidated rings, `df` the
+    batch's transactions and `accounts` the number of accounts in the batch.
+    """
+    nodes = [n.dict() if hasattr(n, "dict") else n for n in node_scores]
+    details = [n.get("details", {}) for n in nodes]
+
+    # 1. Scores over every account: the ones scoring omitted scored 0
+    scores = np.zeros(max(int(accounts), len(nodes)), dtype=np.float64)
+    scores[:len(nodes)] = [n["risk_score"] for n in nodes]
+    histogram = np.histogram(scores, bins=SCORE_BINS, range=(0, 100))[0]
+    summary = {}
+    if len(scores):
+        summary = {
+            "mean": round(float(scores.mean()), 2),
+            "p50": round(float(np.percentile(scores, 50)), 2),
+            "p90": round(float(np.percentile(scores, 90)), 2),
+            "p99": round(float(np.percentile(scores, 99)), 2),
+            "max": round(float(scores.max()), 2),
+        }
+
+    # 2. Patterns and roles
+    scored_ids = {n["id"] for n in nodes}
+    patterns = {
+        "cycles": sum(d.get("cycles") == 1 for d in details),
+        "smurfing": sum(d.get("smurfing") == 1 for d in details),
+        "shells": sum(d.get("shells") == 1 for d in details),
+        "commission": len(scored_ids & {str(c) for c in commission_nodes}),
+        **_counts([d.get("profile") for d in details]),
+    }
+
+    # 3. Rings
+    sizes = np.array([len(r["nodes"]) for r in rings], dtype=np.int64)
+    ring_stats = {
+        "count": len(rings),
+        "total_volume": round(float(sum(r.get("total_volume") or 0 for r in rings)), 2),
+        "size_distribution": {str(k): int(v) for k, v in zip(*np.unique(sizes, return_counts=True))},
+        "pattern_types": _counts([r["pattern_type"] for r in rings]),
+    }
+
+    # 4. Volume by hour of day
+    hours = pd.to_datetime(df["timestamp"]).dt.hour.to_numpy()
+    amounts = df["amount"].to_numpy(dtype=np.float64)
+
+    return {
+        "batch_id": batch_id,
+        "rules_version": rules.rules_version,  # Rules the scores were computed under
+        "accounts": len(scores),
+        "scored_accounts": len(nodes),
+        "transactions": len(df),
+        "score_histogram": {"bin_width": 100 / SCORE_BINS, "counts": histogram.tolist()},
+        "score_summary": summary,
+        "patterns": patterns,
+        "roles": _counts([d.get("role") for d in details]),
+        "rings": ring_stats,
+        "motifs": {name: m["count"] for name, m in (motifs or {}).items()},
+        "volume_by_hour": {
+            "counts": np.bincount(hours, minlength=24).tolist(),
+            "amounts": np.round(np.bincount(hours, weights=amounts, minlength=24), 2).tolist(),
+        },
+    }
+
+
+def stats_path(batch_id: str) -> Path:
+    return artifact_dir(batch_id) / STATS_FILE
+
+
+def save_stats(stats: dict) -> Path:
+    path = stats_path(stats["batch_id"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(stats, f, separators=(",", ":"))
+    return path
+
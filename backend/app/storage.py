@@ -0,0 +1,33 @@
+import os
+from pathlib import Path
+from typing import Optional
+
+# Root of all persisted analysis output (batch JSON + CSV, history store)
+BUCKET_DIR = Path(os.environ.get("RIFT_BUCKET_DIR", Path(__file__).parent.parent / "bucket"))
+ARTIFACTS_DIR = BUCKET_DIR / "artifacts"
+STORE_DIR = BUCKET_DIR / "store"  # Historical transaction store and its indexes
+
+
+def latest_file(pattern: str) -> Optional[Path]:
+    """
+    Returns the most recently written file in the bucket matching `pattern`.
+    """
+    if not BUCKET_DIR.exists():
+        return None
+    files = sorted(BUCKET_DIR.glob(pattern), key=os.path.getmtime, reverse=True)
+    return files[0] if files else None
+
+
+def batch_id_from_path(path: Path) -> str:
+    """
+    Extracts the batch id from `batch_<date>_<time>_<batch_id>.<ext>`.
+    """
+    return path.stem.split("_", 3)[-1]
+
+
+def artifact_dir(batch_id: str) -> Path:
+    """
+    Directory holding the derived, binary artifacts of one batch
+    (compact graph, component labels, ...).
+    """
+    return ARTIFACTS_DIR / batch_id
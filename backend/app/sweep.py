@@ -0,0 +1,259 @@
+"""
+What-if threshold sweeps: evaluate a grid of DetectionConfig settings
+against one batch in a single pass.
+
+Usage:
+    python -m app.sweep --synthetic --grid '{"fan_in_threshold": [5, 10, 15]}'
+    python -m app.sweep --csv bucket/batch_x.csv --grid grid.json --labels mules.txt
+"""
+import argparse
+import itertools
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.detection_engine import detect_cycles, detect_commission
+from app.pipeline import AnalysisState, run_stages
+from app.rules import current_rules
+
+# Fields a sweep can vary. Shell and cycle-horizon rules would need a new
+# traversal per setting, so they stay fixed at their current values.
+SWEEPABLE_FIELDS = {
+    "fan_in_threshold", "fan_out_threshold", "degree_outlier_sigma", "temporal_window_hours",
+    "min_cycle_length", "max_cycle_length",
+    "weight_cycle", "weight_commission", "weight_smurfing", "weight_shell",
+    "score_cycle_detected", "score_commission_retention", "score_smurf_detected", "score_shell_detected",
+    "weight_profile", "score_profile_risk", "merchant_deduction",
+}
+MAX_SWEEP_CONFIGS = 5000
+MAX_OVERLAP_CONFIGS = 64  # Pairwise overlap matrix is only reported up to this many configs
+SWEEP_CHUNK = 128  # Configs scored together; bounds the score matrix at (accounts x SWEEP_CHUNK)
+
+
+def expand_grid(grid: Dict[str, list]) -> List[dict]:
+    """Cartesian product of the grid as a list of partial rule overrides."""
+    unknown = set(grid) - SWEEPABLE_FIELDS
+    if unknown:
+        raise ValueError(f"Fields cannot be swept: {sorted(unknown)}")
+    keys = sorted(grid)
+    configs = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    if len(configs) > MAX_SWEEP_CONFIGS:
+        raise ValueError(f"Grid expands to {len(configs)} configs (max {MAX_SWEEP_CONFIGS})")
+    return configs
+
+
+def _windowed_max_counts(owner: np.ndarray, seconds: np.ndarray, n: int, windows: List[float]) -> np.ndarray:
+    """
+    Max transactions per account inside any sliding window, for every window size at once.
+    Same semantics as detection_engine._count_in_time_window, on sorted per-account arrays.
+    Returns an (n, len(windows)) array.
+    """
+    out = np.zeros((n, len(windows)), dtype=np.int64)
+    if len(owner) == 0:
+        return out
+
+    # Sort by (account, time) and fold the account into the key so one
+    # searchsorted answers every account's window at once
+    order = np.lexsort((seconds, owner))
+    owner, seconds = owner[order], seconds[order]
+    stride = seconds.max() + max(windows) + 1.0
+    keys = owner * stride + seconds
+    starts = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+    position = np.arange(len(keys))
+
+    for j, w in enumerate(windows):
+        counts = np.searchsorted(keys, keys + w, side="right") - position
+        out[owner[starts], j] = np.maximum.reduceat(counts, starts)
+    return out
+
+
+def _cycle_masks(state: AnalysisState, index: Dict, min_len: int, max_len: int, cache: dict):
+    """(in_cycle, in_commission) node masks for one cycle-length setting."""
+    key = (min_len, max_len)
+    if key in cache:
+        return cache[key]
+
+    G = state.outputs["graph"]
+    cycles = [c for c in cache["all_cycles"] if min_len <= len(c) - 1 <= max_len]
+    in_cycle = np.zeros(len(index), dtype=bool)
+    in_cycle[[index[n] for c in cycles for n in c]] = True
+    in_commission = np.zeros(len(index), dtype=bool)
+    in_commission[[index[n] for n in detect_commission(G, cycles)]] = True
+
+    cache[key] = (in_cycle, in_commission)
+    return cache[key]
+
+
+def _all_cycles(state: AnalysisState, min_len: int, max_len: int) -> list:
+    """
+    Cycles covering every length in the grid. Reuses the batch's cycles when
+    the grid stays within the current rules, otherwise runs one wider search.
+    """
+    if min_len >= current_rules.min_cycle_length and max_len <= current_rules.max_cycle_length:
+        return state.outputs["cycles"]
+
+    return detect_cycles(
+        state.outputs["graph"], state.outputs["hubs"],
+        min_len=min(min_len, current_rules.min_cycle_length),
+        max_len=max(max_len, current_rules.max_cycle_length),
+    )
+
+
+def run_sweep(state: AnalysisState, grid: Dict[str, list], labels: Optional[Iterable[str]] = None,
+              min_score: float = 50.0) -> dict:
+    """
+    Evaluates every grid setting (plus the current rules as baseline) against
+    one analysed batch. Detector outputs that do not depend on the swept fields
+    are reused; scores are computed SWEEP_CHUNK settings at a time as (nodes x chunk)
+    matrices, with per-setting counts accumulated across chunks.
+    """
+    base = current_rules.dict()
+    overrides = [{}] + expand_grid(grid)
+    configs = [{**base, **o} for o in overrides]
+    K = len(configs)
+
+    G = state.outputs["graph"]
+    nodes = list(G.nodes())
+    index = {n: i for i, n in enumerate(nodes)}
+    N = len(nodes)
+
+    # 1. Fan-in / Fan-out: sorted per-account timestamps answer every window size in one pass
+    df = state.df[state.df["sender_id"] != state.df["receiver_id"]]
+    seconds = (df["timestamp"] - df["timestamp"].min()).dt.total_seconds().to_numpy()
+    windows = sorted({c["temporal_window_hours"] * 3600.0 for c in configs})
+    window_idx = np.array([windows.index(c["temporal_window_hours"] * 3600.0) for c in configs])
+
+    # (nodes x windows); expanded to configs one chunk at a time below
+    in_counts = _windowed_max_counts(df["receiver_id"].map(index).to_numpy(), seconds, N, windows)
+    out_counts = _windowed_max_counts(df["sender_id"].map(index).to_numpy(), seconds, N, windows)
+    in_degrees = np.array([d for _, d in G.in_degree()], dtype=float)
+    out_degrees = np.array([d for _, d in G.out_degree()], dtype=float)
+
+    # 2. Cycles & commission: one traversal, filtered per length setting
+    cycle_cache = {"all_cycles": _all_cycles(
+        state,
+        min(c["min_cycle_length"] for c in configs),
+        max(c["max_cycle_length"] for c in configs),
+    )}
+
+    # 3. Settings-independent inputs
+    in_shell = np.zeros(N, dtype=bool)
+    in_shell[[index[n] for s in state.outputs["shells"] for n in s]] = True
+    profile_risk = np.zeros(N, dtype=bool)
+    profile_risk[[index[n] for n in state.outputs["profiles"] if n in index]] = True
+    cluster_mule = np.zeros(N, dtype=bool)
+    cluster_mule[[index[m["id"]] for m in state.outputs["clusters"]["mule_accounts"] if m["id"] in index]] = True
+
+    label_mask = None
+    if labels is not None:
+        label_set = {str(l) for l in labels}
+        label_mask = np.array([str(n) in label_set for n in nodes])
+
+    # 4. Score configs in chunks so memory stays at (nodes x SWEEP_CHUNK) whatever the grid size
+    counts = {name: np.zeros(K, dtype=np.int64) for name in ("flagged", "fan_in", "fan_out", "cycle", "base_overlap", "tp")}
+    base_flagged = None
+    kept = [] if K <= MAX_OVERLAP_CONFIGS else None  # Flagged columns for the pairwise overlap matrix
+    for lo in range(0, K, SWEEP_CHUNK):
+        chunk = configs[lo:lo + SWEEP_CHUNK]
+
+        def column(field):
+            return np.array([c[field] for c in chunk], dtype=float)
+
+        # Dynamic thresholds (mean + sigma*std, floored at the absolute minimum) for the chunk at once
+        sigma = column("degree_outlier_sigma")
+        in_threshold = np.maximum(column("fan_in_threshold"), in_degrees.mean() + sigma * in_degrees.std())
+        out_threshold = np.maximum(column("fan_out_threshold"), out_degrees.mean() + sigma * out_degrees.std())
+        fan_in = in_counts[:, window_idx[lo:lo + len(chunk)]] >= in_threshold
+        fan_out = out_counts[:, window_idx[lo:lo + len(chunk)]] >= out_threshold
+
+        in_cycle = np.zeros((N, len(chunk)), dtype=bool)
+        in_commission = np.zeros((N, len(chunk)), dtype=bool)
+        for k, c in enumerate(chunk):
+            in_cycle[:, k], in_commission[:, k] = _cycle_masks(state, index, c["min_cycle_length"], c["max_cycle_length"], cycle_cache)
+
+        # Same arithmetic as calculate_node_score, broadcast over the chunk's configs
+        smurfing = fan_in | fan_out
+        is_merchant = fan_in & ~fan_out & ~in_cycle
+        profile_points = profile_risk[:, None] * column("score_profile_risk") * column("weight_profile")
+        raw = (
+            in_cycle * column("score_cycle_detected") * column("weight_cycle") +
+            in_commission * column("score_commission_retention") * column("weight_commission") +
+            smurfing * column("score_smurf_detected") * column("weight_smurfing") +
+            in_shell[:, None] * column("score_shell_detected") * column("weight_shell") +
+            profile_points
+        )
+        scores = np.clip(raw - is_merchant * column("merchant_deduction"), 0.0, 100.0)
+        floor = (scores <= profile_points) & cluster_mule[:, None]
+        scores[floor] = np.minimum(100.0, 50.0 + scores[floor])  # Heuristic mule floor, as in scoring
+
+        flagged = scores >= min_score
+        if base_flagged is None:
+            base_flagged = flagged[:, 0].copy()  # Config 0 is the current rules
+        part = slice(lo, lo + len(chunk))
+        counts["flagged"][part] = flagged.sum(axis=0)
+        counts["fan_in"][part] = fan_in.sum(axis=0)
+        counts["fan_out"][part] = fan_out.sum(axis=0)
+        counts["cycle"][part] = in_cycle.sum(axis=0)
+        counts["base_overlap"][part] = (flagged & base_flagged[:, None]).sum(axis=0)
+        if label_mask is not None:
+            counts["tp"][part] = (flagged & label_mask[:, None]).sum(axis=0)
+        if kept is not None:
+            kept.append(flagged)
+
+    # 5. Report
+    flagged_counts = counts["flagged"]
+    union_with_base = flagged_counts + flagged_counts[0] - counts["base_overlap"]
+    results = []
+    for k, o in enumerate(overrides):
+        row = {
+            "config": o or "baseline",
+            "flagged": int(flagged_counts[k]),
+            "fan_in_flagged": int(counts["fan_in"][k]),
+            "fan_out_flagged": int(counts["fan_out"][k]),
+            "cycle_nodes": int(counts["cycle"][k]),
+            "jaccard_vs_baseline": round(float(counts["base_overlap"][k] / union_with_base[k]), 4) if union_with_base[k] else 1.0,
+        }
+        if label_mask is not None:
+            tp = int(counts["tp"][k])
+            row["precision"] = round(float(tp / flagged_counts[k]), 4) if flagged_counts[k] else 0.0
+            row["recall"] = round(float(tp / label_mask.sum()), 4) if label_mask.sum() else 0.0
+        results.append(row)
+
+    report = {"accounts": N, "configs": K, "min_score": min_score, "results": results}
+    if kept is not None:
+        flagged = np.hstack(kept).astype(np.int64)
+        report["overlap"] = (flagged.T @ flagged).tolist()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep DetectionConfig settings over one batch")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", type=Path, help="Transaction CSV to analyse")
+    source.add_argument("--synthetic", action="store_true", help="Use a generated, labelled batch")
+    parser.add_argument("--grid", required=True, help="JSON object (or path to one) mapping field -> list of values")
+    parser.add_argument("--labels", type=Path, help="File with one known-bad account id per line")
+    parser.add_argument("--min-score", type=float, default=50.0)
+    args = parser.parse_args()
+
+    grid = json.loads(Path(args.grid).read_text() if Path(args.grid).exists() else args.grid)
+    labels = None
+    if args.synthetic:
+        from app.synthetic import generate_transactions
+        df, labels = generate_transactions()
+    else:
+        df = pd.read_csv(args.csv)
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+    if args.labels:
+        labels = [line.strip() for line in args.labels.read_text().splitlines() if line.strip()]
+
+    state = AnalysisState(df.sort_values("timestamp"))
+    run_stages(state)
+    print(json.dumps(run_sweep(state, grid, labels, args.min_score), indent=2))
+
+
+if __name__ == "__main__":
+    main()
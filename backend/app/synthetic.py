@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+from typing import Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def generate_transactions(
+    n_accounts: int = 500,
+    n_background: int = 3000,
+    n_cycles: int = 5,
+    n_fan_in: int = 3,
+    n_shells: int = 3,
+    days: int = 14,
+    seed: int = 7,
+    start: datetime = datetime(2026, 1, 1),
+) -> Tuple[pd.DataFrame, Set[str]]:
+    """
+    Random background traffic with planted laundering patterns.
+    Returns the transactions (validate_csv schema) and the set of planted account ids.
+    """
+    rng = np.random.default_rng(seed)
+    span = days * 86400
+    rows = []
+    labels = set()
+
+    def add(sender, receiver, amount, ts):
+        rows.append((sender, receiver, round(float(amount), 2), start + timedelta(seconds=int(ts))))
+
+    # 1. Background: retail-like payments between random accounts
+    accounts = [f"ACC{i:05d}" for i in range(n_accounts)]
+    senders = rng.integers(0, n_accounts, n_background)
+    receivers = rng.integers(0, n_accounts, n_background)
+    for s, r, amt, ts in zip(senders, receivers, rng.lognormal(4, 1, n_background), rng.integers(0, span, n_background)):
+        if s != r:
+            add(accounts[s], accounts[r], amt, ts)
+
+    # 2. Chronological cycles with 1-5% commission per hop
+    for c in range(n_cycles):
+        length = int(rng.integers(3, 6))
+        members = [f"CYC{c}_{i}" for i in range(length)]
+        labels.update(members)
+        ts = int(rng.integers(0, span - 86400))
+        amount = float(rng.integers(5000, 20000))
+        for i in range(length):
+            add(members[i], members[(i + 1) % length], amount, ts)
+            amount *= 1 - rng.uniform(0.01, 0.05)
+            ts += int(rng.integers(600, 7200))
+
+    # 3. Fan-in: many smurfs pay one mule within a few hours
+    for m in range(n_fan_in):
+        mule = f"MULE{m}"
+        labels.add(mule)
+        ts = int(rng.integers(0, span - 86400))
+        for i in range(int(rng.integers(12, 20))):
+            add(f"SMURF{m}_{i}", mule, rng.uniform(900, 990), ts + i * 600)
+
+    # 4. Layered shells: a chain of pass-through accounts
+    for c in range(n_shells):
+        hops = [f"SHELL{c}_{i}" for i in range(int(rng.integers(4, 7)))]
+        labels.update(hops[1:-1])
+        ts = int(rng.integers(0, span - 86400))
+        for i in range(len(hops) - 1):
+            add(hops[i], hops[i + 1], 25000, ts + i * 1800)
+
+    df = pd.DataFrame(rows, columns=["sender_id", "receiver_id", "amount", "timestamp"])
+    df.insert(0, "transaction_id", [f"SYN{i:07d}" for i in range(len(df))])
+    return df.sort_values("timestamp").reset_index(drop=True), labels
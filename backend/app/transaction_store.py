@@ -0,0 +1,225 @@
+import json
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+from app.account_profiles import AccountProfiles, load_profiles
+from app.rules import current_rules
+from app.sketches import BloomFilter
+from app.storage import BUCKET_DIR, STORE_DIR
+
+# Historical transactions, one CSV partition per calendar day
+MANIFEST_FILE = STORE_DIR / "manifest.json"
+BLOOM_FILE = STORE_DIR / "tx_ids.bloom.npz"  # Every stored transaction_id, for duplicate rejection
+PARTITION_FORMAT = "%Y%m%d"
+
+# The manifest, Bloom filter and profiles are read-modify-written as a unit;
+# /analyze and /history/backfill may ingest concurrently
+_lock = threading.Lock()
+
+STORE_COLUMNS = ["transaction_id", "sender_id", "receiver_id", "amount", "timestamp"]
+STORE_DTYPES = {"transaction_id": str, "sender_id": str, "receiver_id": str}
+
+
+def _partition_path(day: datetime) -> Path:
+    return STORE_DIR / f"tx_{day.strftime(PARTITION_FORMAT)}.csv"
+
+
+def _load_manifest() -> dict:
+    if not MANIFEST_FILE.exists():
+        return {"partitions": {}, "sources": []}
+    with open(MANIFEST_FILE) as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest: dict):
+    with open(MANIFEST_FILE, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def _read_partition(path: Path) -> pd.DataFrame:
+    return pd.read_csv(path, dtype=STORE_DTYPES, parse_dates=["timestamp"])
+
+
+def _stored_ids(path: Path) -> set:
+    return set(pd.read_csv(path, usecols=["transaction_id"], dtype=str)["transaction_id"])
+
+
+def _load_profiles(manifest: dict) -> AccountProfiles:
+    profiles = load_profiles()
+    if not len(profiles.ids):
+        # Stores written before the index existed: replay the partitions once, oldest first
+        for name in sorted(manifest["partitions"]):
+            profiles.update(_read_partition(STORE_DIR / name))
+    return profiles
+
+
+def _load_bloom(manifest: dict) -> BloomFilter:
+    if BLOOM_FILE.exists():
+        return BloomFilter.load(BLOOM_FILE)
+    bloom = BloomFilter(current_rules.bloom_capacity, current_rules.bloom_error_rate)
+    # Stores written before the filter existed: seed it from the partitions once
+    for name in manifest["partitions"]:
+        bloom.add(list(_stored_ids(STORE_DIR / name)))
+    return bloom
+
+
+def history_horizon_hours() -> int:
+    """
+    How far back a query must look so that no fan-in/out window or cycle
+    ending inside the queried range is cut off at its start.
+    """
+    return max(current_rules.temporal_window_hours, current_rules.cycle_horizon_hours)
+
+
+def ingest(df: pd.DataFrame, source: Optional[str] = None) -> dict:
+    """
+    Appends a validated batch to the day partitions it touches.
+    Rows whose transaction_id is already stored are dropped (first write wins).
+    A Bloom filter over stored ids clears most rows without reading anything;
+    only ids it may have seen are checked exactly, against every partition.
+    New rows also update the account lifecycle index.
+    `source` is the bucket CSV the rows came from, so backfill skips it.
+    """
+    with _lock:
+        return _ingest(df, source)
+
+
+def _ingest(df: pd.DataFrame, source: Optional[str]) -> dict:
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = _load_manifest()
+    bloom = _load_bloom(manifest)
+    profiles = _load_profiles(manifest)
+
+    batch = df[STORE_COLUMNS].copy()
+    batch["timestamp"] = pd.to_datetime(batch["timestamp"])
+    batch["transaction_id"] = batch["transaction_id"].astype(str)
+    unique = batch.drop_duplicates(subset="transaction_id", keep="first")
+    duplicates = len(batch) - len(unique)
+    maybe_seen = bloom.might_contain(unique["transaction_id"].to_numpy())
+
+    # Exact check of the flagged ids against every partition: a re-sent
+    # transaction may carry a timestamp on another day than the stored copy
+    if maybe_seen.any():
+        flagged_ids = set(unique["transaction_id"][maybe_seen])
+        stored = set()
+        for name in manifest["partitions"]:
+            stored |= _stored_ids(STORE_DIR / name) & flagged_ids
+        known = maybe_seen & unique["transaction_id"].isin(stored).to_numpy()
+        duplicates += int(known.sum())
+        unique = unique[~known]
+
+    added = 0
+    touched = []
+    fresh_rows = []
+    for day, fresh in unique.groupby(unique["timestamp"].dt.normalize()):
+        path = _partition_path(day)
+        touched.append(path.name)
+        fresh.sort_values("timestamp").to_csv(path, mode="a", header=not path.exists(), index=False)
+        added += len(fresh)
+        fresh_rows.append(fresh)
+
+        meta = manifest["partitions"].get(path.name)
+        low, high = fresh["timestamp"].min(), fresh["timestamp"].max()
+        if meta is not None:
+            low = min(low, pd.Timestamp(meta["min_timestamp"]))
+            high = max(high, pd.Timestamp(meta["max_timestamp"]))
+        manifest["partitions"][path.name] = {
+            "day": day.strftime("%Y-%m-%d"),
+            "rows": (meta["rows"] if meta else 0) + len(fresh),
+            "min_timestamp": low.isoformat(),
+            "max_timestamp": high.isoformat(),
+        }
+
+    if fresh_rows:
+        fresh = pd.concat(fresh_rows, ignore_index=True)
+        bloom.add(fresh["transaction_id"].to_numpy())
+        profiles.update(fresh)
+    bloom.save(BLOOM_FILE)
+    profiles.save()
+    if bloom.saturated:
+        print(f"Transaction id filter holds {bloom.count} ids (sized for {bloom.capacity}); false positives will rise")
+
+    if source and source not in manifest["sources"]:
+        manifest["sources"].append(source)
+    _save_manifest(manifest)
+
+    return {
+        "partitions": touched,
+        "added": added,
+        "duplicates": duplicates,
+        "exact_checks": int(maybe_seen.sum()),
+    }
+
+
+def record_source(source: str):
+    """Marks a bucket CSV as already ingested (its rows went in before it was written)."""
+    with _lock:
+        manifest = _load_manifest()
+        if source not in manifest["sources"]:
+            manifest["sources"].append(source)
+            _save_manifest(manifest)
+
+
+def list_partitions() -> List[dict]:
+    """Returns manifest entries for every stored partition, oldest first."""
+    manifest = _load_manifest()
+    return [
+        {"partition": name, **meta}
+        for name, meta in sorted(manifest["partitions"].items())
+    ]
+
+
+def load_range(start: datetime, end: datetime, lookback_hours: int = 0) -> pd.DataFrame:
+    """
+    Loads stored transactions in [start - lookback_hours, end].
+    Only the day partitions overlapping that interval are read.
+    """
+    lower = pd.Timestamp(start) - timedelta(hours=lookback_hours)
+    upper = pd.Timestamp(end)
+
+    # Partition pruning: file names encode the day, so no read is needed to skip one
+    first_day = lower.normalize()
+    last_day = upper.normalize()
+    frames = []
+    for name in sorted(_load_manifest()["partitions"]):
+        day = pd.Timestamp(datetime.strptime(name[3:-4], PARTITION_FORMAT))
+        if first_day <= day <= last_day:
+            frames.append(_read_partition(STORE_DIR / name))
+
+    if not frames:
+        return pd.DataFrame(columns=STORE_COLUMNS)
+
+    df = pd.concat(frames, ignore_index=True)
+    df = df[(df["timestamp"] >= lower) & (df["timestamp"] <= upper)]
+    return df.sort_values("timestamp").reset_index(drop=True)
+
+
+def backfill() -> dict:
+    """
+    Ingests every batch CSV already in the bucket that the store has not seen.
+    """
+    manifest = _load_manifest()
+    seen = set(manifest["sources"])
+    ingested = []
+    skipped = []
+    for path in sorted(BUCKET_DIR.glob("batch_*.csv")):
+        if path.name in seen:
+            continue
+        try:
+            df = pd.read_csv(path, dtype=STORE_DTYPES)
+            df["timestamp"] = pd.to_datetime(df["timestamp"])
+        except Exception as e:
+            print(f"Skipping {path.name} during backfill: {e}")
+            skipped.append(path.name)
+            continue
+        if df.empty or set(STORE_COLUMNS) - set(df.columns):
+            skipped.append(path.name)
+            continue
+        ingest(df, source=path.name)
+        ingested.append(path.name)
+
+    return {"ingested": len(ingested), "skipped": skipped}
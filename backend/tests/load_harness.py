@@ -0,0 +1,275 @@
+"""
+Concurrent load test of the dashboard endpoints.
+
+Seeds a throwaway bucket with synthetic batches (uploaded through /analyze),
+then replays a weighted mix of dashboard traffic from N concurrent analysts
+against the in-process ASGI app, or a running server with --url. Reports
+p50 / p95 / p99 latency, throughput and error rate per endpoint and flags
+regressions against a baseline file. Latencies are compared as ratios to the
+/health p95 of the same run, so a baseline recorded on one machine still
+means something on another. Needs httpx (see requirements-dev.txt).
+
+    python tests/load_harness.py                      # run, compare against tests/load_baseline.json
+    python tests/load_harness.py --concurrency 50 --duration 30
+    python tests/load_harness.py --save-baseline      # record this machine's numbers
+    python tests/load_harness.py --url http://localhost:8000 --batches 0   # a running server's own data
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "load_baseline.json"
+REFERENCE_ENDPOINT = "health"  # Cheapest route; the per-run yardstick for latency ratios
+
+# Endpoint name -> relative weight in the traffic mix (a dashboard load is
+# /data + /stats + /investigation/suspects; analysts then open networks and layouts)
+DEFAULT_MIX = {
+    "data": 20,
+    "stats": 10,
+    "suspects": 20,
+    "network": 20,
+    "layout": 10,
+    "export": 5,
+    "account": 5,
+    "search": 5,
+    "health": 5,
+}
+
+
+# 1. Fixtures
+
+def synthetic_batch(rng: np.random.Generator, n_tx: int, n_accounts: int, start: pd.Timestamp) -> pd.DataFrame:
+    """
+    Random background transfers plus planted cycles, fan-ins and shell
+    chains, so every investigation endpoint has suspects to return.
+    """
+    senders = rng.integers(0, n_accounts, n_tx)
+    receivers = rng.integers(0, n_accounts, n_tx)
+    rows = pd.DataFrame({
+        "sender_id": [f"ACC{i:06d}" for i in senders],
+        "receiver_id": [f"ACC{i:06d}" for i in receivers],
+        "amount": np.round(rng.lognormal(6, 1, n_tx), 2),
+        "timestamp": start + pd.to_timedelta(rng.integers(0, 7 * 86400, n_tx), unit="s"),
+    })
+
+    planted = []
+    for k in range(max(1, n_tx // 500)):
+        t = start + pd.Timedelta(hours=int(rng.integers(0, 150)))
+        ring = [f"RING{k:03d}_{i}" for i in range(int(rng.integers(3, 6)))]
+        amount = 10000.0
+        for i, (a, b) in enumerate(zip(ring, ring[1:] + ring[:1])):
+            planted.append((a, b, amount, t + pd.Timedelta(hours=i)))
+            amount *= 0.97
+        mule = f"MULE{k:03d}"
+        for i in range(12):
+            planted.append((f"SMURF{k:03d}_{i}", mule, 900.0, t + pd.Timedelta(minutes=10 * i)))
+        chain = [f"SHELL{k:03d}_{i}" for i in range(5)]
+        for i, (a, b) in enumerate(zip(chain, chain[1:])):
+            planted.append((a, b, 5000.0, t + pd.Timedelta(hours=2 * i)))
+    planted = pd.DataFrame(planted, columns=["sender_id", "receiver_id", "amount", "timestamp"])
+
+    df = pd.concat([rows, planted], ignore_index=True).sort_values("timestamp", kind="stable")
+    df.insert(0, "transaction_id", [f"TX{start.strftime('%Y%m%d')}_{i:07d}" for i in range(len(df))])
+    return df
+
+
+async def seed_bucket(client, batches: int, transactions: int, accounts: int, seed: int) -> list:
+    """Uploads the synthetic batches through /analyze; returns the suspect ids of the latest one."""
+    rng = np.random.default_rng(seed)
+    for b in range(batches):
+        df = synthetic_batch(rng, transactions, accounts, pd.Timestamp("2026-01-05") + pd.Timedelta(days=7 * b))
+        buf = io.StringIO()
+        df.to_csv(buf, index=False)
+        response = await client.post("/analyze", files={"file": (f"load_{b}.csv", buf.getvalue().encode(), "text/csv")})
+        response.raise_for_status()
+    response = await client.get("/investigation/suspects")
+    return [s["id"] for s in response.json()]
+
+
+# 2. Traffic
+
+def build_requests(suspects: list) -> dict:
+    """Endpoint name -> function producing the path for one request."""
+    pick = lambda rng: rng.choice(suspects) if suspects else "UNKNOWN"
+    return {
+        "data": lambda rng: "/data",
+        "stats": lambda rng: "/stats",
+        "suspects": lambda rng: "/investigation/suspects",
+        "network": lambda rng: f"/investigation/network/{pick(rng)}",
+        "layout": lambda rng: f"/investigation/layout/{pick(rng)}",
+        "export": lambda rng: "/export/json",
+        "account": lambda rng: f"/accounts/{pick(rng)}",
+        "search": lambda rng: f"/accounts/search?q={pick(rng)[:4]}",
+        "health": lambda rng: "/health",
+    }
+
+
+async def analyst(client, worker: int, seed: int, mix: dict, paths: dict, deadline: float, samples: list):
+    rng = random.Random(seed * 1000 + worker)
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            response = await client.get(paths[name](rng))
+            ok = response.status_code < 400
+        except Exception:
+            ok = False
+        samples.append((name, (time.perf_counter() - start) * 1000, ok))
+
+
+async def run_load(client, concurrency: int, duration: float, seed: int, mix: dict, paths: dict) -> tuple:
+    samples = []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(analyst(client, w, seed, mix, paths, deadline, samples) for w in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+# 3. Report
+
+def summarize(samples: list, elapsed: float) -> dict:
+    frame = pd.DataFrame(samples, columns=["endpoint", "ms", "ok"])
+    report = {}
+    for name, group in list(frame.groupby("endpoint")) + [("ALL", frame)]:
+        ms = group["ms"].to_numpy()
+        report[name] = {
+            "requests": int(len(group)),
+            "throughput_rps": round(len(group) / elapsed, 1),
+            "error_rate": round(1 - group["ok"].mean(), 4),
+            "p50_ms": round(float(np.percentile(ms, 50)), 2),
+            "p95_ms": round(float(np.percentile(ms, 95)), 2),
+            "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        }
+    reference = report.get(REFERENCE_ENDPOINT)
+    if reference and reference["p95_ms"] > 0:
+        for r in report.values():
+            r["p95_ratio"] = round(r["p95_ms"] / reference["p95_ms"], 3)
+    return report
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Endpoints whose p95 (relative to the reference endpoint's, when both runs
+    have it) grew beyond `tolerance`, or whose error rate grew at all.
+    """
+    regressions = []
+    for name, base in baseline.items():
+        now = report.get(name)
+        if now is None:
+            continue
+        if "p95_ratio" in base and "p95_ratio" in now:
+            if name != REFERENCE_ENDPOINT and now["p95_ratio"] > base["p95_ratio"] * (1 + tolerance):
+                regressions.append(f"{name}: p95 {now['p95_ratio']}x {REFERENCE_ENDPOINT} vs baseline {base['p95_ratio']}x")
+        elif now["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {now['p95_ms']}ms vs baseline {base['p95_ms']}ms (absolute; include {REFERENCE_ENDPOINT} in the mix to compare ratios)")
+        if now["error_rate"] > base["error_rate"]:
+            regressions.append(f"{name}: error rate {now['error_rate']:.2%} vs baseline {base['error_rate']:.2%}")
+    return regressions
+
+
+def print_report(report: dict, concurrency: int, elapsed: float):
+    print(f"\n{concurrency} concurrent analysts, {elapsed:.1f}s")
+    header = f"{'endpoint':<10} {'requests':>9} {'rps':>8} {'errors':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'p95 x ref':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, r in report.items():
+        print(f"{name:<10} {r['requests']:>9} {r['throughput_rps']:>8} {r['error_rate']:>8.2%} "
+              f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} {r.get('p95_ratio', '-'):>10}")
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        name, weight = part.split("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+async def main(args) -> int:
+    import httpx
+
+    mix = parse_mix(args.mix) if args.mix else dict(DEFAULT_MIX)
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+    else:
+        from app.api import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load", timeout=60)
+
+    async with client:
+        if args.url and args.batches == 0:
+            suspects = [s["id"] for s in (await client.get("/investigation/suspects")).json()]
+        else:
+            print(f"Seeding {args.batches} batches x {args.transactions} transactions (seed {args.seed})...")
+            suspects = await seed_bucket(client, args.batches, args.transactions, args.accounts, args.seed)
+        paths = build_requests(suspects)
+        unknown = set(mix) - set(paths)
+        if unknown:
+            print(f"Unknown endpoints in mix: {sorted(unknown)}; choose from {sorted(paths)}")
+            return 2
+
+        if args.warmup:
+            await run_load(client, args.concurrency, args.warmup, args.seed + 1, mix, paths)
+        samples, elapsed = await run_load(client, args.concurrency, args.duration, args.seed, mix, paths)
+
+    report = summarize(samples, elapsed)
+    print_report(report, args.concurrency, elapsed)
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps({
+            "settings": {k: getattr(args, k) for k in ("concurrency", "duration", "batches", "transactions", "accounts", "seed")},
+            "endpoints": report,
+        }, indent=2) + "\n")
+        print(f"\nBaseline written to {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"\nNo baseline at {baseline_path}; run with --save-baseline to record one")
+        return 0
+
+    regressions = compare(report, json.loads(baseline_path.read_text())["endpoints"], args.tolerance)
+    if regressions:
+        print(f"\nREGRESSIONS (tolerance {args.tolerance:.0%}):")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions against {baseline_path.name} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent load test of the dashboard endpoints")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent analysts")
+    parser.add_argument("--duration", type=float, default=15, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="Unmeasured seconds first (fills caches)")
+    parser.add_argument("--mix", help="Weights, e.g. data=30,suspects=30,network=40 (default: dashboard mix)")
+    parser.add_argument("--batches", type=int, default=3, help="Synthetic batches to seed (0 with --url: use server data)")
+    parser.add_argument("--transactions", type=int, default=5000, help="Background transactions per batch")
+    parser.add_argument("--accounts", type=int, default=2000, help="Background accounts")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--bucket", help="Bucket directory of the in-process app (default: a fresh temporary one)")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed p95 growth over the baseline")
+    args = parser.parse_args()
+
+    # The bucket location is read when the app is imported, so set it first
+    if not args.url:
+        os.environ["RIFT_BUCKET_DIR"] = str(Path(args.bucket or tempfile.mkdtemp(prefix="rift_load_")).resolve())
+    os.environ.setdefault("RIFT_WARMUP", "0")
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.chdir(BACKEND_DIR)
+
+    sys.exit(asyncio.run(main(args)))
@@ -0,0 +1,93 @@
+"""
+Motif counts from the one-pass engine against a brute-force enumeration
+over every combination of transactions in a small random batch.
+
+    python -m pytest tests/test_motifs.py
+"""
+import itertools
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.motifs import MotifSpec, find_motifs
+
+
+def random_batch(seed: int, n_accounts: int = 7, n_tx: int = 36) -> pd.DataFrame:
+    """Transactions among a handful of accounts, one per distinct minute so the time order has no ties."""
+    rng = random.Random(seed)
+    base = datetime(2026, 1, 1)
+    minutes = sorted(rng.sample(range(6 * 60), n_tx))
+    rows = []
+    for i, m in enumerate(minutes):
+        sender, receiver = rng.sample(range(n_accounts), 2)
+        rows.append({
+            "transaction_id": f"tx{i}",
+            "sender_id": f"A{sender}",
+            "receiver_id": f"A{receiver}",
+            "amount": 100.0,
+            "timestamp": base + timedelta(minutes=m),
+        })
+    return pd.DataFrame(rows)
+
+
+def brute_force_count(df: pd.DataFrame, spec: MotifSpec) -> int:
+    """Sets of transactions that map onto the motif's edges in an allowed order, within its window."""
+    df = df.sort_values("timestamp").reset_index(drop=True)
+    seconds = [ts.timestamp() for ts in df["timestamp"]]
+    pairs = list(zip(df["sender_id"], df["receiver_id"]))
+    orderings = spec.orderings()
+    count = 0
+    for combo in itertools.combinations(range(len(df)), len(spec.edges)):
+        if seconds[combo[-1]] - seconds[combo[0]] > spec.delta_seconds:
+            continue
+        for ordering in orderings:
+            bindings = {}
+            for tx, e in zip(combo, ordering):
+                for var, account in zip(spec.edges[e], pairs[tx]):
+                    if bindings.setdefault(var, account) != account:
+                        break
+                else:
+                    continue
+                break
+            else:
+                if len(set(bindings.values())) == len(bindings):
+                    count += 1
+                    break
+    return count
+
+
+def specs():
+    window = 2 * 3600
+    return [
+        MotifSpec("scatter_gather", ["s>m1", "s>m2", "m1>t", "m2>t"], window, order=[(0, 2), (1, 3)]),
+        MotifSpec("pass_through", ["a>b", "b>c"], 30 * 60),
+        MotifSpec("fan_then_cycle", ["s>m1", "s>m2", "m1>m2", "m2>s"], window, order=[(0, 2), (2, 3), (1, 3)]),
+    ]
+
+
+def test_counts_match_brute_force():
+    for seed in range(3):
+        df = random_batch(seed)
+        found = find_motifs(df, specs())
+        for spec in specs():
+            expected = brute_force_count(df, spec)
+            assert found[spec.name]["count"] == expected, (seed, spec.name, found[spec.name]["count"], expected)
+
+
+def test_instances_respect_window():
+    df = random_batch(0)
+    for spec in specs():
+        for instance in find_motifs(df, [spec])[spec.name]["instances"]:
+            assert instance["end"] - instance["start"] <= spec.delta_seconds
+
+
+if __name__ == "__main__":
+    test_counts_match_brute_force()
+    test_instances_respect_window()
+    print("motif checks passed")
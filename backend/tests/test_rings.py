@@ -0,0 +1,72 @@
+"""
+Ring consolidation: patterns merge on a shared non-hub transfer edge or on
+member overlap at ring_merge_jaccard, never on a single shared account.
+
+    python -m pytest tests/test_rings.py
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.compact_graph import CompactGraph
+from app.rings import consolidate_rings
+from app.rules import current_rules
+
+
+def compact_for(*paths) -> CompactGraph:
+    """Compact graph holding one transaction per consecutive pair of every path."""
+    base = datetime(2026, 1, 1)
+    edges = sorted({(a, b) for path in paths for a, b in zip(path, path[1:])})
+    return CompactGraph.from_dataframe(pd.DataFrame({
+        "transaction_id": [f"tx{i}" for i in range(len(edges))],
+        "sender_id": [a for a, _ in edges],
+        "receiver_id": [b for _, b in edges],
+        "amount": 100.0,
+        "timestamp": [base + timedelta(minutes=i) for i in range(len(edges))],
+    }))
+
+
+def ring_sets(cycles, shells=(), hubs=None):
+    compact = compact_for(*cycles, *shells)
+    rings = consolidate_rings(compact, list(cycles), list(shells), [], hubs)
+    return sorted(sorted(r["nodes"]) for r in rings)
+
+
+def test_shared_edge_merges_below_jaccard():
+    # {A,B,C} vs {A,B,D,E}: Jaccard 2/5 is under the threshold, but both use A -> B
+    assert current_rules.ring_merge_jaccard > 0.4
+    rings = ring_sets([["A", "B", "C", "A"], ["A", "B", "D", "E", "A"]])
+    assert rings == [["A", "B", "C", "D", "E"]]
+
+
+def test_single_shared_account_does_not_merge():
+    # Only A in common: Jaccard 1/5 and no common edge
+    rings = ring_sets([["A", "B", "C", "A"], ["A", "F", "G", "A"]])
+    assert rings == [["A", "B", "C"], ["A", "F", "G"]]
+
+
+def test_jaccard_merges_without_shared_edge():
+    # Same four accounts walked the other way round: no common edge, Jaccard 1
+    rings = ring_sets([["P", "Q", "R", "S", "P"]], shells=[["P", "S", "R", "Q"]])
+    assert rings == [["P", "Q", "R", "S"]]
+
+
+def test_shared_hub_edge_does_not_merge():
+    # Both cycles run through hub H and share H -> X; the non-hub overlap {X} of {X,Y,Z} is too small
+    hubs = {"H": {"degree": 500}}
+    rings = ring_sets([["H", "X", "Y", "H"], ["H", "X", "Z", "H"]], hubs=hubs)
+    assert rings == [["H", "X", "Y"], ["H", "X", "Z"]]
+    assert ring_sets([["H", "X", "Y", "H"], ["H", "X", "Z", "H"]]) == [["H", "X", "Y", "Z"]]
+
+
+if __name__ == "__main__":
+    test_shared_edge_merges_below_jaccard()
+    test_single_shared_account_does_not_merge()
+    test_jaccard_merges_without_shared_edge()
+    test_shared_hub_edge_does_not_merge()
+    print("ring checks passed")
@@ -0,0 +1,55 @@
+"""
+Sketch-mode fan-in / fan-out: the candidates flagged by the sketches must
+cover every account the exact window count puts at or above the floor, so
+confirming only the candidates never loses a detection.
+
+    python -m pytest tests/test_sketches.py
+"""
+import os
+import sys
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app import sketches
+from app.detection_engine import detect_fan_in, detect_fan_out
+from app.graph_builder import build_graph
+from app.rules import current_rules
+from app.synthetic import generate_transactions
+
+# (mean, std) of zero puts the dynamic threshold at the configured floor
+AT_FLOOR = (0.0, 0.0)
+
+
+def check_superset(floor: int, chunk_rows: int):
+    saved = (current_rules.fan_in_threshold, current_rules.fan_out_threshold, sketches.SKETCH_CHUNK_ROWS)
+    current_rules.fan_in_threshold = current_rules.fan_out_threshold = floor
+    sketches.SKETCH_CHUNK_ROWS = chunk_rows
+    try:
+        df, _ = generate_transactions(seed=11)
+        G = build_graph(df)
+        sketch = sketches.sketch_candidates(df)
+        exact_in = set(detect_fan_in(G, degree_stats=AT_FLOOR))
+        exact_out = set(detect_fan_out(G, degree_stats=AT_FLOOR))
+    finally:
+        current_rules.fan_in_threshold, current_rules.fan_out_threshold, sketches.SKETCH_CHUNK_ROWS = saved
+
+    assert exact_in, "fixture should contain fan-in accounts"
+    assert exact_in <= sketch["in"]["candidates"], sorted(exact_in - sketch["in"]["candidates"])
+    assert exact_out <= sketch["out"]["candidates"], sorted(exact_out - sketch["out"]["candidates"])
+
+
+def test_fan_in_candidates_cover_exact_set():
+    check_superset(floor=10, chunk_rows=sketches.SKETCH_CHUNK_ROWS)
+
+
+def test_candidates_cover_exact_set_across_chunks():
+    # A low floor and small chunks: many accounts sit near the floor and
+    # their windows straddle chunk boundaries
+    check_superset(floor=3, chunk_rows=257)
+
+
+if __name__ == "__main__":
+    test_fan_in_candidates_cover_exact_set()
+    test_candidates_cover_exact_set_across_chunks()
+    print("sketch checks passed")
@@ -1,6 +1,6 @@
 import { BarChart2 } from 'lucide-react';
 
-export default function ActivePatternCard({ data = [], filterType = 'all' }) {
+export default function ActivePatternCard({ data = [], filterType = 'all', patterns = null }) {
     // If filterType is 'all' or 'mule_accounts', show mule pattern stats
     // If 'websites', show something else? Or just show general stats.
 
@@ -60,6 +60,18 @@ export default function ActivePatternCard({ data = [], filterType = 'all' }) {
                 </div>
             </div>
 
+            {/* Pattern counts over every scored account (/stats) */}
+            {patterns && (
+                <div className="grid grid-cols-4 gap-2 mb-6">
+                    {['cycles', 'smurfing', 'shells', 'commission'].map(name => (
+                        <div key={name} className="bg-gray-50 rounded-lg p-2 text-center">
+                            <p className="text-sm font-bold text-gray-900">{(patterns[name] || 0).toLocaleString()}</p>
+                            <p className="text-[10px] text-gray-500 uppercase tracking-wide">{name}</p>
+                        </div>
+                    ))}
+                </div>
+            )}
+
             <div className="flex-1">
                 <p className="text-[10px] font-semibold text-gray-400 uppercase tracking-wider mb-2">Key Entities Involved</p>
                 <div className="space-y-2">
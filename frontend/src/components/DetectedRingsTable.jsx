@@ -1,4 +1,4 @@
-export default function DetectedRingsTable({ rings = [], filterType = 'all' }) {
+export default function DetectedRingsTable({ rings = [], filterType = 'all', ringStats = null }) {
     // Filter rings based on type if needed, or show all top rings
     // Backend rings have: { ring_id, nodes: [], risk_score, pattern_type, ... }
 
@@ -16,7 +16,14 @@ export default function DetectedRingsTable({ rings = [], filterType = 'all' }) {
     return (
         <div className="bg-white rounded-2xl border border-border p-6 shadow-sm overflow-hidden flex flex-col h-full">
             <div className="flex items-center justify-between mb-4">
-                <h3 className="text-lg font-bold text-gray-900">Detected Rings Summary</h3>
+                <div>
+                    <h3 className="text-lg font-bold text-gray-900">Detected Rings Summary</h3>
+                    {ringStats && (
+                        <p className="text-xs text-gray-500 mt-1">
+                            {ringStats.count.toLocaleString()} rings • sizes {Object.entries(ringStats.size_distribution).map(([size, n]) => `${size}:${n}`).join(' ')}
+                        </p>
+                    )}
+                </div>
                 <button className="px-3 py-1.5 bg-blue-50 text-primary text-xs font-semibold rounded-lg hover:bg-blue-100 transition-colors">
                     View All Analysis
                 </button>
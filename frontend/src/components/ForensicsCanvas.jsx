@@ -1,11 +1,17 @@
 import { useEffect, useRef, useState } from 'react';
 import * as d3 from 'd3';
-import { Plus, Minus, Scan, Filter, Layers, Download } from 'lucide-react';
+import { Plus, Minus, Scan, Filter, Layers, Download, Play, Pause } from 'lucide-react';
 import API_BASE from '../api';
 
 export default function ForensicsCanvas({ suspectId }) {
     const svgRef = useRef(null);
     const containerRef = useRef(null);
+    const applyCutoffRef = useRef(() => {});
+
+    // Playback: activity series from /investigation/network, scrubbed bucket by bucket
+    const [activity, setActivity] = useState(null);
+    const [step, setStep] = useState(null);
+    const [playing, setPlaying] = useState(false);
 
 
     // Configuration for Node Styles (No hardcoded if/else chains in render)
@@ -14,10 +20,6 @@ export default function ForensicsCanvas({ suspectId }) {
             suspected: { fill: '#fee2e2', stroke: '#ef4444', r: 30 }, // Red
             related: { fill: '#dbeafe', stroke: '#3b82f6', r: 20 },   // Blue
             neutral: { fill: '#f1f5f9', stroke: '#94a3b8', r: 15 }    // Gray
-        },
-        simulation: {
-            charge: -500,
-            distance: 150
         }
     };
 
@@ -57,11 +59,158 @@ export default function ForensicsCanvas({ suspectId }) {
             .attr('d', 'M0,-5L10,0L0,5')
             .attr('fill', '#94a3b8');
 
-        // Fetch Data
-        fetch(`${API_BASE}/investigation/network/${suspectId}`)
-            .then(res => res.json())
+        // Zoomable layer: large rings are explored by zooming into super-nodes
+        const layer = svg.append('g');
+        svg.call(d3.zoom().scaleExtent([0.2, 8]).on('zoom', (e) => layer.attr('transform', e.transform)));
+        const linkLayer = layer.append('g').attr('stroke', '#cbd5e1').attr('stroke-width', 1.5);
+        const nodeLayer = layer.append('g');
+
+        let nodes = [];
+        let links = [];
+        let focusId = suspectId;
+        // "source>target" -> first transaction time (epoch seconds), and first activity per account
+        let firstSeen = {};
+        let nodeFirstSeen = {};
+        let cutoff = null;
+
+        // Decode the compact layout payload (parallel arrays + flat [source, target, count] triplets).
+        // Positions are pre-computed on the server on a 1000x1000 canvas; `frame` maps them on screen.
+        const decodeLayout = (data, frame) => {
+            const decoded = data.ids.map((id, i) => ({
+                id,
+                x: frame.x + data.x[i] * frame.scale,
+                y: frame.y + data.y[i] * frame.scale,
+                size: data.size[i],
+                isGroup: data.lod,
+                ...GRAPH_CONFIG.styles[id === focusId ? 'suspected' : data.lod ? 'neutral' : 'related'],
+                r: id === focusId ? GRAPH_CONFIG.styles.suspected.r : data.r[i],
+            }));
+            const decodedLinks = [];
+            for (let i = 0; i < data.links.length; i += 3) {
+                decodedLinks.push({
+                    source: decoded[data.links[i]],
+                    target: decoded[data.links[i + 1]],
+                    count: data.links[i + 2],
+                    dashed: data.lod,
+                });
+            }
+            return { decoded, decodedLinks };
+        };
+
+        const render = () => {
+            const link = linkLayer.selectAll('line')
+                .data(links)
+                .join('line')
+                .attr('stroke-dasharray', d => d.dashed ? '4 4' : null)
+                .attr('marker-end', 'url(#arrow)');
+
+            const node = nodeLayer.selectAll('g.node')
+                .data(nodes, d => d.id)
+                .join(enter => {
+                    const g = enter.append('g').attr('class', 'node');
+
+                    // Focus Ring
+                    g.filter(d => d.id === focusId)
+                        .append('circle')
+                        .attr('r', d => d.r + 20)
+                        .attr('fill', 'none')
+                        .attr('stroke', '#ef4444')
+                        .attr('stroke-width', 1.5)
+                        .attr('stroke-dasharray', '4 4')
+                        .attr('class', 'animate-spin-slow');
+
+                    // Node Circles (Style from Config)
+                    g.append('circle')
+                        .attr('class', 'body')
+                        .attr('r', d => d.r)
+                        .attr('fill', d => d.fill)
+                        .attr('stroke', d => d.stroke)
+                        .attr('stroke-width', 2);
+
+                    // Central Focus Dot
+                    g.filter(d => d.id === focusId && !d.isGroup)
+                        .append('circle').attr('r', 6).attr('fill', '#ef4444');
+
+                    // Labels (super-nodes show how many accounts they hold)
+                    g.append('text')
+                        .text(d => d.isGroup ? `${d.size} accounts` : d.id)
+                        .attr('dy', d => d.r + 15)
+                        .attr('text-anchor', 'middle')
+                        .attr('class', 'text-[10px] font-mono font-medium fill-slate-500');
+
+                    g.filter(d => d.isGroup)
+                        .style('cursor', 'pointer')
+                        .on('click', (e, d) => expandGroup(d));
+
+                    return g;
+                })
+                .call(d3.drag()
+                    .on('drag', (e, d) => {
+                        d.x = e.x;
+                        d.y = e.y;
+                        position();
+                    }));
+
+            const position = () => {
+                link
+                    .attr('x1', d => d.source.x)
+                    .attr('y1', d => d.source.y)
+                    .attr('x2', d => d.target.x)
+                    .attr('y2', d => d.target.y);
+                node.attr('transform', d => `translate(${d.x},${d.y})`);
+            };
+            position();
+            applyCutoff(cutoff);
+        };
+
+        // Dim accounts and edges that had no transaction yet at `t` (null shows everything)
+        const applyCutoff = (t) => {
+            cutoff = t;
+            const hidden = (first) => t !== null && first !== undefined && first > t;
+            linkLayer.selectAll('line')
+                .attr('opacity', d => hidden(firstSeen[`${d.source.id}>${d.target.id}`]) ? 0.05 : 1);
+            nodeLayer.selectAll('g.node')
+                .attr('opacity', d => hidden(nodeFirstSeen[d.id]) ? 0.2 : 1);
+        };
+        applyCutoffRef.current = applyCutoff;
+
+        // Replace a super-node by its members, laid out inside the area it occupied.
+        // The super-node stays as a dashed hull so aggregated links keep an anchor.
+        const expandGroup = (group) => {
+            if (group.expanded) return;
+            fetch(`${API_BASE}/investigation/layout/expand/${group.id}`)
+                .then(res => {
+                    // 404: the group cannot be expanded further
+                    if (!res.ok) throw new Error(`Expand ${group.id} failed: ${res.status}`);
+                    return res.json();
+                })
+                .then(data => {
+                    const spread = Math.max(group.r * 6, 120);
+                    const frame = { x: group.x - spread / 2, y: group.y - spread / 2, scale: spread / 1000 };
+                    const { decoded, decodedLinks } = decodeLayout(data, frame);
+
+                    group.expanded = true;
+                    nodeLayer.selectAll('g.node').filter(d => d.id === group.id).select('circle.body')
+                        .attr('r', spread / 2 + 10)
+                        .attr('fill', 'none')
+                        .attr('stroke-dasharray', '6 4');
+
+                    nodes = [...nodes, ...decoded];
+                    links = [...links, ...decodedLinks];
+                    render();
+                })
+                .catch(err => console.error("Group expand error:", err));
+        };
+
+        // Fetch pre-rendered layout
+        fetch(`${API_BASE}/investigation/layout/${suspectId}`)
+            .then(res => {
+                // When the suspect is collapsed into a super-node, highlight that node instead
+                focusId = res.headers.get('X-Focus-Node') || suspectId;
+                return res.ok ? res.json() : null;
+            })
             .then(data => {
-                if (!data || !data.nodes || data.nodes.length === 0) {
+                if (!data || !data.ids || data.ids.length === 0) {
                     // Show "No Data" message
                     svg.append('text')
                         .attr('x', width / 2)
@@ -72,87 +221,23 @@ export default function ForensicsCanvas({ suspectId }) {
                     return;
                 }
 
-                const nodes = data.nodes.filter(n => n).map(d => ({
-                    ...d,
-                    ...GRAPH_CONFIG.styles[d.group || 'neutral']
-                }));
-                const links = data.links.map(d => ({ ...d }));
-
-                // Simulation
-                const simulation = d3.forceSimulation(nodes)
-                    .force('link', d3.forceLink(links).id(d => d.id).distance(GRAPH_CONFIG.simulation.distance))
-                    .force('charge', d3.forceManyBody().strength(GRAPH_CONFIG.simulation.charge))
-                    .force('center', d3.forceCenter(width / 2, height / 2).strength(0.05));
-
-                // Links
-                const link = svg.append('g')
-                    .attr('stroke', '#cbd5e1')
-                    .attr('stroke-width', 1.5)
-                    .selectAll('line')
-                    .data(links)
-                    .join('line')
-                    .attr('stroke-dasharray', d => d.dashed ? '4 4' : null)
-                    .attr('marker-end', 'url(#arrow)');
-
-                // Nodes
-                const node = svg.append('g')
-                    .selectAll('g')
-                    .data(nodes)
-                    .join('g')
-                    .call(d3.drag()
-                        .on('start', (e, d) => {
-                            if (!e.active) simulation.alphaTarget(0.3).restart();
-                            d.fx = d.x;
-                            d.fy = d.y;
-                        })
-                        .on('drag', (e, d) => {
-                            d.fx = e.x;
-                            d.fy = e.y;
-                        })
-                        .on('end', (e, d) => {
-                            if (!e.active) simulation.alphaTarget(0);
-                            d.fx = null;
-                            d.fy = null;
-                        }));
-
-                // Focus Ring
-                node.filter(d => d.id === suspectId)
-                    .append('circle')
-                    .attr('r', 50)
-                    .attr('fill', 'none')
-                    .attr('stroke', '#ef4444')
-                    .attr('stroke-width', 1.5)
-                    .attr('stroke-dasharray', '4 4')
-                    .attr('class', 'animate-spin-slow');
-
-                // Node Circles (Style from Config)
-                node.append('circle')
-                    .attr('r', d => d.r)
-                    .attr('fill', d => d.fill)
-                    .attr('stroke', d => d.stroke)
-                    .attr('stroke-width', 2);
-
-                // Central Focus Dot
-                node.filter(d => d.id === suspectId)
-                    .append('circle').attr('r', 6).attr('fill', '#ef4444');
-
-                // Labels
-                node.append('text')
-                    .text(d => d.id)
-                    .attr('dy', d => d.r + 15)
-                    .attr('text-anchor', 'middle')
-                    .attr('class', 'text-[10px] font-mono font-medium fill-slate-500');
+                const scale = Math.min(width, height) / 1000;
+                const frame = { x: (width - 1000 * scale) / 2, y: (height - 1000 * scale) / 2, scale };
+                ({ decoded: nodes, decodedLinks: links } = decodeLayout(data, frame));
+                render();
 
-                // Tick
-                simulation.on('tick', () => {
-                    link
-                        .attr('x1', d => d.source.x)
-                        .attr('y1', d => d.source.y)
-                        .attr('x2', d => d.target.x)
-                        .attr('y2', d => d.target.y);
-
-                    node.attr('transform', d => `translate(${d.x},${d.y})`);
-                });
+                // Per-edge first activity + activity series for playback
+                return fetch(`${API_BASE}/investigation/network/${suspectId}?buckets=48`)
+                    .then(res => res.ok ? res.json() : null)
+                    .then(network => {
+                        if (!network || !network.activity) return;
+                        network.links.forEach(l => {
+                            firstSeen[`${l.source}>${l.target}`] = l.first;
+                            nodeFirstSeen[l.source] = Math.min(nodeFirstSeen[l.source] ?? Infinity, l.first);
+                            nodeFirstSeen[l.target] = Math.min(nodeFirstSeen[l.target] ?? Infinity, l.first);
+                        });
+                        setActivity(network.activity);
+                    });
             })
             .catch(err => {
                 console.error("Graph fetch error:", err);
@@ -166,6 +251,35 @@ export default function ForensicsCanvas({ suspectId }) {
 
     }, [suspectId]);
 
+    // Reset playback when the suspect changes
+    useEffect(() => {
+        setActivity(null);
+        setStep(null);
+        setPlaying(false);
+    }, [suspectId]);
+
+    // Scrubbing: show the network as of the end of the selected bucket
+    useEffect(() => {
+        if (!activity) return;
+        applyCutoffRef.current(step === null ? null : activity.start + (step + 1) * activity.bucket_seconds - 1);
+    }, [activity, step]);
+
+    useEffect(() => {
+        if (!playing || !activity) return;
+        const last = activity.counts.length - 1;
+        if (step !== null && step >= last) {
+            setPlaying(false);
+            return;
+        }
+        const timer = setTimeout(() => setStep(s => Math.min(s === null ? 0 : s + 1, last)), 250);
+        return () => clearTimeout(timer);
+    }, [playing, activity, step]);
+
+    const maxCount = activity ? Math.max(1, ...activity.counts) : 1;
+    const stepTime = activity && step !== null
+        ? new Date((activity.start + (step + 1) * activity.bucket_seconds) * 1000).toISOString().slice(0, 16).replace('T', ' ')
+        : 'All activity';
+
     return (
         <div className="flex-1 flex flex-col h-full bg-slate-50 relative overflow-hidden">
             {/* Header */}
@@ -198,6 +312,50 @@ export default function ForensicsCanvas({ suspectId }) {
                 <svg ref={svgRef} className="block w-full h-full" />
             </div>
 
+            {/* Playback: activity histogram + scrubber */}
+            {activity && (
+                <div className="absolute bottom-4 left-6 right-6 z-10 bg-white/90 border border-gray-200 rounded-lg shadow-sm px-4 py-3">
+                    <div className="flex items-end gap-px h-10 mb-2">
+                        {activity.counts.map((count, i) => (
+                            <div
+                                key={i}
+                                onClick={() => setStep(i)}
+                                title={`${count} transactions`}
+                                className={`flex-1 cursor-pointer rounded-sm ${step === null || i <= step ? 'bg-primary/70' : 'bg-gray-200'}`}
+                                style={{ height: `${(count / maxCount) * 100}%`, minHeight: count ? 2 : 0 }}
+                            />
+                        ))}
+                    </div>
+                    <div className="flex items-center gap-3">
+                        <button
+                            onClick={() => {
+                                if (!playing && (step === null || step >= activity.counts.length - 1)) setStep(0);
+                                setPlaying(!playing);
+                            }}
+                            className="p-1 text-gray-500 hover:text-primary"
+                            title={playing ? 'Pause' : 'Play'}
+                        >
+                            {playing ? <Pause className="w-4 h-4" /> : <Play className="w-4 h-4" />}
+                        </button>
+                        <input
+                            type="range"
+                            min={0}
+                            max={activity.counts.length - 1}
+                            value={step ?? activity.counts.length - 1}
+                            onChange={e => { setPlaying(false); setStep(Number(e.target.value)); }}
+                            className="flex-1"
+                        />
+                        <button
+                            onClick={() => { setPlaying(false); setStep(null); }}
+                            className="text-xs font-mono text-gray-500 hover:text-primary w-36 text-right"
+                            title="Show all activity"
+                        >
+                            {stepTime}
+                        </button>
+                    </div>
+                </div>
+            )}
+
 
         </div>
     );
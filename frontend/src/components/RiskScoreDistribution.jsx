@@ -1,43 +1,49 @@
 import { Info } from 'lucide-react';
 
-export default function RiskScoreDistribution({ data = [] }) {
-    // Compute histogram buckets from real data
-    // Since we don't have a real "risk score" in the data, we'll simulate one mostly for decoration
-    // OR we can calculate a heuristic score: (txCount * uniqueSenders) clamped to 100
+export default function RiskScoreDistribution({ data = [], stats = null }) {
+    // Server-side histogram over every account of the batch when available (/stats);
+    // accounts with no risk signal sit in the first bin
+    let buckets;
+    let entityCount;
+    let flaggedCount = null;
+    if (stats?.score_histogram) {
+        buckets = stats.score_histogram.counts;
+        entityCount = stats.accounts;
+        flaggedCount = stats.scored_accounts;
+    } else {
+        // Fallback: heuristic score over the loaded cluster entities
+        const calculateRisk = (item) => {
+            const tx = item.txCount || 0;
+            const senders = item.uniqueSenders || 0;
+            return Math.min(100, (tx * senders * 2));
+        };
 
-    const calculateRisk = (item) => {
-        // Simple heuristic for visualization
-        const tx = item.txCount || 0;
-        const senders = item.uniqueSenders || 0;
-        const score = Math.min(100, (tx * senders * 2));
-        return score;
-    };
-
-    const scores = data.map(item => calculateRisk(item));
-
-    // Create buckets: 0-12.5, 12.5-25 ... 87.5-100 (8 buckets)
-    const buckets = Array(8).fill(0);
-    scores.forEach(s => {
-        const bucketIndex = Math.min(7, Math.floor(s / 12.5));
-        buckets[bucketIndex]++;
-    });
+        // Create buckets: 0-12.5, 12.5-25 ... 87.5-100 (8 buckets)
+        buckets = Array(8).fill(0);
+        data.forEach(item => {
+            const bucketIndex = Math.min(7, Math.floor(calculateRisk(item) / 12.5));
+            buckets[bucketIndex]++;
+        });
+        entityCount = data.length;
+    }
 
     const maxVal = Math.max(...buckets, 1); // Avoid div by zero
 
+    const bins = buckets.length;
     const bars = buckets.map((count, i) => ({
         height: `${(count / maxVal) * 90}%`,
-        label: i % 2 === 0 ? (i * 12.5).toFixed(0) : ''
+        // Colour by score band, whatever the bin count
+        band: (i + 1) / bins
     }));
 
-    const entityCount = data.length;
-
     return (
         <div className="bg-white rounded-2xl border border-border p-6 shadow-sm h-full flex flex-col">
             <div className="flex items-start justify-between mb-2">
                 <div>
                     <h3 className="text-lg font-bold text-gray-900">Risk Score Distribution</h3>
                     <p className="text-xs text-gray-500 mt-1 leading-relaxed">
-                        Frequency of risk scores across {entityCount.toLocaleString()} entities.
+                        Frequency of risk scores across {entityCount.toLocaleString()} {flaggedCount === null ? 'entities' : 'accounts'}
+                        {flaggedCount !== null && ` (${flaggedCount.toLocaleString()} with a non-zero score)`}.
                     </p>
                 </div>
                 <Info className="w-4 h-4 text-gray-400 cursor-pointer hover:text-gray-600" />
@@ -47,7 +53,7 @@ export default function RiskScoreDistribution({ data = [] }) {
                 {bars.map((bar, i) => (
                     <div key={i} className="flex-1 flex flex-col items-center gap-2 group cursor-pointer h-full justify-end">
                         <div
-                            className={`w-full rounded-t-sm transition-all duration-500 group-hover:opacity-80 min-h-[4px] ${i > 6 ? 'bg-danger' : i > 4 ? 'bg-warning' : i > 2 ? 'bg-blue-300' : 'bg-gray-200'
+                            className={`w-full rounded-t-sm transition-all duration-500 group-hover:opacity-80 min-h-[4px] ${bar.band > 0.875 ? 'bg-danger' : bar.band > 0.625 ? 'bg-warning' : bar.band > 0.375 ? 'bg-blue-300' : 'bg-gray-200'
                                 }`}
                             style={{ height: bar.height || '4px' }}
                         />
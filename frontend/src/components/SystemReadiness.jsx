@@ -5,7 +5,6 @@ import API_BASE from '../api';
 export default function SystemReadiness() {
     const [status, setStatus] = useState({
         engine: false,
-        models: false,
         database: false,
         encryption: true,
         latency: null,
@@ -24,8 +23,7 @@ export default function SystemReadiness() {
             if (res.ok) {
                 const data = await res.json();
                 setStatus({
-                    engine: true,
-                    models: data.models_loaded ?? true,
+                    engine: data.ready ?? true,
                     database: data.database_connected ?? true,
                     encryption: true,
                     latency: data.latency_ms ?? 12,
@@ -37,7 +35,6 @@ export default function SystemReadiness() {
             setStatus((prev) => ({
                 ...prev,
                 engine: false,
-                models: false,
                 database: false,
             }));
         } finally {
@@ -45,15 +42,9 @@ export default function SystemReadiness() {
         }
     }
 
-    const allOnline = status.engine && status.models && status.database;
+    const allOnline = status.engine && status.database;
 
     const statusItems = [
-        {
-            icon: CheckCircle2,
-            label: 'Forensic Models Loaded',
-            sub: 'RIFT-v2.41 (Money Muling)',
-            ok: status.models,
-        },
         {
             icon: Database,
             label: 'Database Connected',
@@ -10,6 +10,7 @@ import axios from 'axios';
 
 export default function DashboardPage() {
     const [data, setData] = useState(null);
+    const [stats, setStats] = useState(null);
     const [loading, setLoading] = useState(true);
     const [selectedCluster, setSelectedCluster] = useState('all');
     const [filters, setFilters] = useState({ fanWindow: 2, commissionRetention: false });
@@ -20,6 +21,11 @@ export default function DashboardPage() {
             .then(res => setData(res.data))
             .catch(err => console.error(err))
             .finally(() => setLoading(false));
+
+        // Aggregates over every scored account (the batch JSON only holds the top 50)
+        axios.get(`${API_BASE}/stats`)
+            .then(res => setStats(res.data))
+            .catch(() => setStats(null));
     }, []);
 
     // Filter logic for lower widgets
@@ -89,6 +95,7 @@ export default function DashboardPage() {
                                 <DetectedRingsTable
                                     rings={data?.rings || []}
                                     filterType={selectedCluster}
+                                    ringStats={stats?.rings}
                                 />
                             </div>
 
@@ -99,12 +106,12 @@ export default function DashboardPage() {
 
                             {/* Risk Distribution */}
                             <div className="h-[320px]">
-                                <RiskScoreDistribution data={widgetData} />
+                                <RiskScoreDistribution data={widgetData} stats={stats} />
                             </div>
 
                             {/* Active Pattern Card */}
                             <div className="flex-1">
-                                <ActivePatternCard data={widgetData} filterType={selectedCluster} />
+                                <ActivePatternCard data={widgetData} filterType={selectedCluster} patterns={stats?.patterns} />
                             </div>
 
                         </div>